@@ -6,6 +6,7 @@ This module provides helpers used during replay parsing and stats rebuilding.
 
 import logging
 from collections import defaultdict
+from itertools import groupby
 
 from . import config
 
@@ -16,37 +17,116 @@ def _calculate_losing_streaks(player_game_chronology, player_stats):
     Args:
         player_game_chronology: dict mapping player names to a list of
             game results: [{"won": bool, "has_winner": bool, "timestamp": ...}, ...]
+            Each list must already be in chronological order (callers feed
+            games pre-sorted by datetime, so no per-player sort is done here).
         player_stats: dict to store aggregated stats per player.
             The 'max_losing_streak' key is added/updated for each player.
     """
     logging.debug("Calculating losing streaks...")
     for player_name, games in player_game_chronology.items():
-        if not games:
-            player_stats[player_name]["max_losing_streak"] = 0
-            continue
-        sorted_games = sorted(games, key=lambda g: g["timestamp"])
-        current_streak = 0
-        max_streak = 0
-        for game in sorted_games:
-            if not game.get("has_winner", True):
-                continue
-            if not game["won"]:
-                current_streak += 1
-            else:
-                max_streak = max(max_streak, current_streak)
-                current_streak = 0
-        max_streak = max(max_streak, current_streak)
-        player_stats[player_name]["max_losing_streak"] = max_streak
+        player_stats[player_name]["max_losing_streak"] = _max_losing_streak(
+            bool(g["won"]) for g in games if g.get("has_winner", True)
+        )
+
+
+def _max_losing_streak(outcomes):
+    """Return the longest run of losses in a chronological sequence of win flags."""
+    return max(
+        (sum(1 for _ in run) for won, run in groupby(outcomes) if not won),
+        default=0,
+    )
 
 
-def extract_single_game_deltas(match_obj, human_players):
+def _action_player_name(player, player_number_to_name):
+    """Resolve the human player who issued an input, or None.
+
+    The input's player is either an mgz Player object or a bare player
+    number; both resolve through the human players' number map.
+    """
+    if isinstance(player, int):
+        return player_number_to_name.get(player)
+    return player_number_to_name.get(getattr(player, "number", None))
+
+
+def _count_queue(input_action, player, ctx):
+    player_deltas, player_number_to_name = ctx
+    current_player = player_number_to_name.get(getattr(player, "number", None))
+
+    payload = input_action.payload
+    unit_name = payload.get("unit")
+    amount = payload.get("amount", 1) or 1
+
+    if unit_name and current_player and unit_name not in config.NON_MILITARY_UNITS:
+        deltas = player_deltas.get(current_player)
+        if deltas is not None:
+            deltas["units_created"][unit_name] += amount
+            deltas["total_units_created"] += amount
+
+
+def _count_trade(input_action, player, ctx):
+    player_deltas, player_number_to_name = ctx
+    name = _action_player_name(player, player_number_to_name)
+    if name and name in player_deltas:
+        deltas = player_deltas[name]
+        deltas["market_transactions"] += 1
+        payload = input_action.payload
+        if (
+            isinstance(payload, dict)
+            and "resource_id" in payload
+            and "amount" in payload
+        ):
+            if payload["resource_id"] in [0, 1, 2]:
+                deltas["total_resource_units_traded"] += payload["amount"]
+
+
+def _count_wall(input_action, player, ctx):
+    player_deltas, player_number_to_name = ctx
+    name = _action_player_name(player, player_number_to_name)
+    if name and name in player_deltas:
+        player_deltas[name]["wall_segments_built"] += 1
+
+
+def _count_delete(input_action, player, ctx):
+    player_deltas, player_number_to_name = ctx
+    name = _action_player_name(player, player_number_to_name)
+    if name and name in player_deltas:
+        player_deltas[name]["buildings_deleted"] += 1
+
+
+def _count_research(input_action, player, ctx):
+    player_deltas, player_number_to_name = ctx
+    name = _action_player_name(player, player_number_to_name)
+    if name and name in player_deltas:
+        tech_name = input_action.param
+        if tech_name in config.CRUCIAL_UPGRADES_SET:
+            # Idempotent: a tech researched twice in one game still counts once
+            player_deltas[name]["crucial_researched"][tech_name] = 1
+
+
+# Input type name -> stat counter. Inputs of any other type are ignored.
+_INPUT_HANDLERS = {
+    "Queue": _count_queue,
+    "Buy": _count_trade,
+    "Sell": _count_trade,
+    "Wall": _count_wall,
+    "Delete": _count_delete,
+    "Research": _count_research,
+}
+
+
+def extract_single_game_deltas(match_obj, human_players, player_number_to_name=None):
     """Extract per-game stat deltas from a single parsed match.
 
     Used by registry_builder.replay_to_registry_entry() during replay parsing.
 
     Args:
         match_obj: Parsed match object (from mgz.parse_match).
-        human_players: List of human player objects (already alias-resolved).
+        human_players: List of human player objects. Only read when
+            player_number_to_name is not given, to build that map.
+        player_number_to_name: Optional prebuilt {player.number: name} map
+            holding the alias-resolved names used as player_deltas keys.
+            When given, it is the sole source of human player names and
+            human_players is ignored.
 
     Returns:
         (player_deltas, game_deltas) where:
@@ -57,9 +137,12 @@ def extract_single_game_deltas(match_obj, human_players):
             crucial_researched (dict of tech_name -> 1)
         - game_deltas: dict with total_units_created_overall (int)
     """
+    if player_number_to_name is None:
+        player_number_to_name = {p.number: p.name for p in human_players}
+
     player_deltas = {}
-    for p in human_players:
-        player_deltas[p.name] = {
+    for name in player_number_to_name.values():
+        player_deltas[name] = {
             "units_created": defaultdict(int),
             "total_units_created": 0,
             "market_transactions": 0,
@@ -69,75 +152,21 @@ def extract_single_game_deltas(match_obj, human_players):
             "crucial_researched": {},
         }
 
-    total_units_created_overall = 0
-    player_number_to_name = {p.number: p.name for p in human_players}
-    human_player_names = {p.name for p in human_players}
-    crucial_techs_seen = defaultdict(set)
+    ctx = (player_deltas, player_number_to_name)
 
     if hasattr(match_obj, "inputs") and match_obj.inputs:
+        # Most inputs (Move, Stop, ...) have no handler and are skipped
+        # after this single dict lookup
+        get_handler = _INPUT_HANDLERS.get
         for input_action in match_obj.inputs:
-            input_type_name = str(getattr(input_action, "type", "N/A"))
-
-            action_player_name = None
-            if hasattr(input_action, "player") and input_action.player is not None:
-                if hasattr(input_action.player, "name"):
-                    potential_name = input_action.player.name
-                    if potential_name in human_player_names:
-                        action_player_name = potential_name
-                elif isinstance(input_action.player, int):
-                    action_player_name = player_number_to_name.get(input_action.player)
-
-            if input_type_name == "Queue":
-                player_number_for_queue = getattr(
-                    getattr(input_action, "player", None), "number", None
-                )
-                current_player = player_number_to_name.get(player_number_for_queue)
-
-                payload = getattr(input_action, "payload", {})
-                unit_name = payload.get("unit")
-                amount = payload.get("amount", 1) or 1
-
-                if (
-                    unit_name
-                    and current_player
-                    and unit_name not in config.NON_MILITARY_UNITS
-                ):
-                    if current_player in player_deltas:
-                        player_deltas[current_player]["units_created"][unit_name] += amount
-                        player_deltas[current_player]["total_units_created"] += amount
-                        total_units_created_overall += amount
-
-            elif input_type_name in ["Buy", "Sell"]:
-                if action_player_name and action_player_name in player_deltas:
-                    player_deltas[action_player_name]["market_transactions"] += 1
-                    payload = input_action.payload
-                    if (
-                        isinstance(payload, dict)
-                        and "resource_id" in payload
-                        and "amount" in payload
-                    ):
-                        if payload["resource_id"] in [0, 1, 2]:
-                            player_deltas[action_player_name][
-                                "total_resource_units_traded"
-                            ] += payload["amount"]
-
-            elif input_type_name == "Wall":
-                if action_player_name and action_player_name in player_deltas:
-                    player_deltas[action_player_name]["wall_segments_built"] += 1
-
-            elif input_type_name == "Delete":
-                if action_player_name and action_player_name in player_deltas:
-                    player_deltas[action_player_name]["buildings_deleted"] += 1
-
-            elif input_type_name == "Research":
-                if action_player_name and action_player_name in player_deltas:
-                    tech_name = getattr(input_action, "param", None)
-                    if tech_name in config.CRUCIAL_UPGRADES:
-                        if tech_name not in crucial_techs_seen[action_player_name]:
-                            crucial_techs_seen[action_player_name].add(tech_name)
-                            player_deltas[action_player_name]["crucial_researched"][
-                                tech_name
-                            ] = 1
+            # mgz inputs expose fixed dataclass fields; read them directly and
+            # drop only the malformed action, not the whole game's deltas
+            try:
+                handler = get_handler(input_action.type)
+                if handler is not None:
+                    handler(input_action, input_action.player, ctx)
+            except AttributeError:
+                continue
 
     # Convert defaultdicts to regular dicts for JSON serialization
     for name in player_deltas:
@@ -145,5 +174,8 @@ def extract_single_game_deltas(match_obj, human_players):
             player_deltas[name]["units_created"]
         )
 
+    total_units_created_overall = sum(
+        d["total_units_created"] for d in player_deltas.values()
+    )
     game_deltas = {"total_units_created_overall": total_units_created_overall}
     return player_deltas, game_deltas
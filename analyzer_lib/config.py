@@ -32,6 +32,9 @@ PLAYER_ALIASES = {
     "cornichonmasquez": "cornichonmasquez",
 }
 
+# Canonical player names (alias targets). Games with anyone else are rejected.
+KNOWN_PLAYER_NAMES = frozenset(PLAYER_ALIASES.values())
+
 # List of crucial upgrades. Used for the 'Most Likely to Forget Crucial Upgrade' award.
 # These are examples, adjust as per your game version and what you consider crucial.
 CRUCIAL_UPGRADES = sorted(
@@ -45,6 +48,8 @@ CRUCIAL_UPGRADES = sorted(
         # Add military unit line upgrades if desired (e.g., Man-at-Arms, Crossbowman, Knight)
     ]
 )
+# Set view of CRUCIAL_UPGRADES for membership checks while parsing Research inputs.
+CRUCIAL_UPGRADES_SET = frozenset(CRUCIAL_UPGRADES)
 
 # Set of unit names that are considered non-military.
 # Used to filter units for certain stats, e.g., when determining favorite military unit.
@@ -61,13 +66,15 @@ TRUESKILL_ELO_SCALING_FACTOR = 40  # Scale to ELO-like numbers (25*40=1000)
 MIN_GAMES_FOR_RANKING = 60  # Minimum rated games for main ranking table
 PLOT_MIN_GAMES_THRESHOLD = 5  # Minimum games for rating evolution plot
 
-NON_MILITARY_UNITS = {
-    "Villager",
-    "Fishing Ship",
-    "Trade Cart",
-    "Trade Cog",
-    # Add other non-combat/economic units if needed (e.g., "Transport Ship" if not used for combat drops)
-}
+NON_MILITARY_UNITS = frozenset(
+    {
+        "Villager",
+        "Fishing Ship",
+        "Trade Cart",
+        "Trade Cog",
+        # Add other non-combat/economic units if needed (e.g., "Transport Ship" if not used for combat drops)
+    }
+)
 
 # Database
 DB_FILENAME = "aoe2_data.db"
@@ -80,6 +80,15 @@ CREATE TABLE IF NOT EXISTS analysis_cache (
     value   TEXT NOT NULL
 );
 
+-- ============ DERIVED: REPLAY FILE INDEX ============
+
+CREATE TABLE IF NOT EXISTS replay_files (
+    path        TEXT PRIMARY KEY,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    sha256      TEXT NOT NULL
+);
+
 -- ============ INDEXES ============
 
 CREATE INDEX IF NOT EXISTS idx_games_fingerprint ON games(fingerprint);
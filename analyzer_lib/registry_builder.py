@@ -10,6 +10,7 @@ import io
 import logging
 import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 
 from . import config
@@ -137,53 +138,46 @@ def replay_to_registry_entry(file_bytes, sha256, filename_hint="", source_path=N
         entry["status"] = "too_short"
         return entry
 
-    # --- Filter human players ---
-    human_players = [
-        p
-        for p in match_obj.players
-        if hasattr(p, "profile_id") and p.profile_id is not None
-    ]
-
-    # --- Check for unknown players ---
-    canonical_names = set(config.PLAYER_ALIASES.values())
-    for p in human_players:
-        aliased = config.PLAYER_ALIASES.get(p.name, p.name)
-        if aliased not in canonical_names:
+    # --- Single pass over the players: filter humans, resolve aliases, reject
+    # unknown players, and build the number->name map and teams together ---
+    # The mgz Player objects are left untouched; inputs are attributed to
+    # players through player_number_to_name. team_has_winner keeps first-seen
+    # team order, like teams_dict.
+    aliases = config.PLAYER_ALIASES
+    known_names = config.KNOWN_PLAYER_NAMES
+    human_players = []
+    player_number_to_name = {}
+    team_has_winner = {}
+    teams_dict = {}
+    for p in match_obj.players:
+        if getattr(p, "profile_id", None) is None:
+            continue
+        name = aliases.get(p.name, p.name)
+        if name not in known_names:
             entry["status"] = "unknown_player"
             return entry
+        human_players.append(p)
+        player_number_to_name[p.number] = name
 
-    # --- Apply aliases ---
-    for p in human_players:
-        p.name = config.PLAYER_ALIASES.get(p.name, p.name)
-
-    # --- Build teams ---
-    teams_data = defaultdict(list)
-    for p in human_players:
         team_id = p.team_id
         if isinstance(team_id, list):
             team_id = team_id[0] if team_id else -1
-        teams_data[team_id].append(p)
-
-    # --- Determine winner ---
-    winning_team_id = None
-    for team_id, players_in_team in teams_data.items():
-        if any(p.winner for p in players_in_team):
-            winning_team_id = team_id
-            break
-
-    # --- Build teams dict for registry ---
-    teams_dict = {}
-    for tid, players in teams_data.items():
-        teams_dict[str(tid)] = [
+        won = bool(p.winner)
+        team_has_winner[team_id] = team_has_winner.get(team_id, False) or won
+        teams_dict.setdefault(str(team_id), []).append(
             {
-                "name": p.name,
+                "name": name,
                 "civ": getattr(p, "civilization", "Unknown"),
-                "winner": bool(p.winner),
+                "winner": won,
                 "handicap": getattr(p, "handicap", 100),
                 "eapm": getattr(p, "eapm", None),
             }
-            for p in players
-        ]
+        )
+
+    # --- Determine winner ---
+    winning_team_id = next(
+        (tid for tid, has_winner in team_has_winner.items() if has_winner), None
+    )
 
     entry["teams"] = teams_dict
     entry["winning_team_id"] = (
@@ -199,7 +193,9 @@ def replay_to_registry_entry(file_bytes, sha256, filename_hint="", source_path=N
     # --- Extract action-based deltas ---
     try:
         player_deltas, game_deltas = extract_single_game_deltas(
-            match_obj, human_players
+            match_obj,
+            human_players,
+            player_number_to_name=player_number_to_name,
         )
         entry["player_deltas"] = player_deltas
         entry["game_level_deltas"] = game_deltas
@@ -212,16 +208,81 @@ def replay_to_registry_entry(file_bytes, sha256, filename_hint="", source_path=N
     return entry
 
 
-def sync_registry_from_disk(registry, replay_dir=None):
+def scan_replay_files(replay_dir):
+    """Recursively collect replay files under replay_dir as os.DirEntry objects.
+
+    Uses os.scandir so file type and stat info come from the directory
+    entries, and returns files in the same order as os.walk (a directory's
+    files before its subdirectories, symlinked directories not followed).
+    """
+    found = []
+    _scan_into(replay_dir, found)
+    return found
+
+
+def _scan_into(path, found):
+    """Append replay DirEntry objects under path to found, recursively."""
+    subdirs = []
+    with os.scandir(path) as it:
+        for dir_entry in it:
+            if dir_entry.is_dir():
+                if not dir_entry.is_symlink():
+                    subdirs.append(dir_entry.path)
+            elif dir_entry.name.lower().endswith(REPLAY_EXTENSIONS):
+                found.append(dir_entry)
+    for subdir in subdirs:
+        _scan_into(subdir, found)
+
+
+# SHA256s already in the registry, set once per parser process by
+# _init_parse_worker so workers can skip registered files after hashing
+_registered_sha256s = frozenset()
+
+
+def _init_parse_worker(registered_sha256s):
+    """Process-pool initializer: share the registered SHA256s with a worker."""
+    global _registered_sha256s
+    _registered_sha256s = registered_sha256s
+
+
+def _parse_replay_file(job):
+    """Process-pool worker: read one replay from disk and build its entry.
+
+    Takes a picklable (file_path, sha256) tuple, where sha256 is None if the
+    file has no cached hash. The file is read once and, when needed, hashed
+    from the same bytes that are parsed. Returns (sha256, entry), with entry
+    None for files already in the registry, so no mgz objects cross the
+    process boundary.
+    """
+    fp, sha256 = job
+    with open(fp, "rb") as f:
+        file_bytes = f.read()
+    if sha256 is None:
+        sha256 = hashlib.sha256(file_bytes).hexdigest()
+        if sha256 in _registered_sha256s:
+            return sha256, None
+    return sha256, replay_to_registry_entry(
+        file_bytes,
+        sha256,
+        filename_hint=os.path.basename(fp),
+        # Store relative path from project root for download support
+        source_path=os.path.relpath(fp),
+    )
+
+
+def sync_registry_from_disk(registry, replay_dir=None, max_workers=None):
     """Scan local replay files and add any new ones to the registry.
 
     Only files whose SHA256 is not already in the registry are parsed.
+    Files are parsed in parallel with a process pool (parse_match is
+    CPU-bound); results are registered in the parent in scan order.
     Files with duplicate fingerprints (same game, different recorder) are
     also skipped.
 
     Args:
         registry: A GameRegistry instance (from server.processing).
         replay_dir: Directory to scan. Defaults to config.RECORDED_GAMES_DIR.
+        max_workers: Number of parser processes. Defaults to os.cpu_count().
 
     Returns:
         dict with counts: {"new": N, "skipped_existing": N, ...}
@@ -234,63 +295,78 @@ def sync_registry_from_disk(registry, replay_dir=None):
         return {"error": f"Directory not found: {replay_dir}"}
 
     # Find all replay files
-    file_paths = []
-    for root, _, files in os.walk(replay_dir):
-        for fn in files:
-            if any(fn.lower().endswith(ext) for ext in REPLAY_EXTENSIONS):
-                file_paths.append(os.path.join(root, fn))
+    replay_entries = scan_replay_files(replay_dir)
 
-    if not file_paths:
+    if not replay_entries:
         logger.info("No replay files found.")
         return {"total_files": 0, "new": 0, "skipped_existing": 0}
 
-    logger.info(f"Found {len(file_paths)} replay files, checking for new ones...")
+    logger.info(f"Found {len(replay_entries)} replay files, checking for new ones...")
 
-    # Pre-filter: hash files and skip those already in registry
-    files_to_parse = []
+    # Pre-filter: files whose (path, mtime, size) are unchanged since the
+    # last sync reuse their cached SHA256 and are skipped without being read
+    # if already registered. Everything else goes to the parser pool, which
+    # reads each file once and hashes those same bytes before parsing.
+    jobs = []  # (file_path, cached sha256 or None)
+    job_files = []  # (rel_path, stat) matching jobs
     skipped_existing = 0
 
-    for fp in file_paths:
-        with open(fp, "rb") as f:
-            file_bytes = f.read()
-        sha256 = hashlib.sha256(file_bytes).hexdigest()
-        if registry.has_game(sha256):
+    for dir_entry in replay_entries:
+        fp = dir_entry.path
+        rel_path = os.path.relpath(fp)
+        st = dir_entry.stat()
+        sha256 = registry.get_file_sha256(rel_path, st.st_mtime_ns, st.st_size)
+        if sha256 is not None and registry.has_game(sha256):
             skipped_existing += 1
             # Backfill source_path for entries that predate download support
-            registry.update_source_path(sha256, os.path.relpath(fp))
+            registry.update_source_path(sha256, rel_path)
         else:
-            files_to_parse.append((fp, sha256, file_bytes))
+            jobs.append((fp, sha256))
+            job_files.append((rel_path, st))
 
     logger.info(
         f"Skipped {skipped_existing} already-registered files, "
-        f"parsing {len(files_to_parse)} new files..."
+        f"checking {len(jobs)} new or changed files..."
     )
 
     counts = {
-        "total_files": len(file_paths),
+        "total_files": len(replay_entries),
         "new": 0,
         "skipped_existing": skipped_existing,
         "skipped_duplicate": 0,
     }
     status_counts = defaultdict(int)
 
-    for fp, sha256, file_bytes in files_to_parse:
-        filename = os.path.basename(fp)
-        # Store relative path from project root for download support
-        source_path = os.path.relpath(fp)
-        entry = replay_to_registry_entry(
-            file_bytes, sha256, filename_hint=filename, source_path=source_path
-        )
-
-        # Fingerprint dedup (same game recorded by different players)
-        fp_hash = entry.get("fingerprint")
-        if fp_hash and registry.has_fingerprint(fp_hash):
-            counts["skipped_duplicate"] += 1
-            continue
-
-        registry.add_game(entry)
-        counts["new"] += 1
-        status_counts[entry["status"]] += 1
+    if jobs:
+        new_file_hashes = []
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_parse_worker,
+            initargs=(registry.get_sha256s(),),
+        ) as pool:
+            results = pool.map(_parse_replay_file, jobs, chunksize=4)
+            for (_, cached_sha256), (rel_path, st), (sha256, entry) in zip(
+                jobs, job_files, results
+            ):
+                if cached_sha256 is None:
+                    new_file_hashes.append(
+                        (rel_path, st.st_mtime_ns, st.st_size, sha256)
+                    )
+                if entry is None:
+                    counts["skipped_existing"] += 1
+                    registry.update_source_path(sha256, rel_path)
+                    continue
+
+                # Fingerprint dedup (same game recorded by different players)
+                fp_hash = entry.get("fingerprint")
+                if fp_hash and registry.has_fingerprint(fp_hash):
+                    counts["skipped_duplicate"] += 1
+                    continue
+
+                registry.add_game(entry)
+                counts["new"] += 1
+                status_counts[entry["status"]] += 1
+        registry.record_file_sha256s(new_file_hashes)
 
     counts["status_breakdown"] = dict(status_counts)
     # Flush any backfilled source_path updates
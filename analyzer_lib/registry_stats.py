@@ -7,34 +7,52 @@ game_results, and head_to_head from a list of registry game entries. Used by:
   - web/services.py (compute_event_awards)
 """
 
-from collections import defaultdict
+import sys
+from collections import Counter, defaultdict
 
 from .analyze_games import _calculate_losing_streaks
 
+# Scalar per-player counters summed straight from registry player_deltas
+DELTA_COUNTER_KEYS = (
+    "total_units_created",
+    "market_transactions",
+    "total_resource_units_traded",
+    "wall_segments_built",
+    "buildings_deleted",
+)
+
+
+def _intern(name):
+    """Intern a recurring civ/unit/tech name used as a stats dict key."""
+    return sys.intern(name) if isinstance(name, str) else name
+
+
+def _new_player_stats():
+    """Return a fresh per-player stats dict."""
+    return {
+        "games_played": 0,
+        "games_for_win_rate": 0,
+        "wins": 0,
+        "total_playtime_seconds": 0,
+        "total_eapm": 0,
+        "games_with_eapm": 0,
+        "civs_played": defaultdict(int),
+        "civ_wins": defaultdict(int),
+        "civ_losses": defaultdict(int),
+        "civ_games_for_win_rate": defaultdict(int),
+        "units_created": Counter(),
+        "total_units_created": 0,
+        "market_transactions": 0,
+        "total_resource_units_traded": 0,
+        "wall_segments_built": 0,
+        "buildings_deleted": 0,
+        "crucial_researched": defaultdict(int),
+    }
+
 
 def make_empty_player_stats():
     """Return a defaultdict factory for per-player stats."""
-    return defaultdict(
-        lambda: {
-            "games_played": 0,
-            "games_for_win_rate": 0,
-            "wins": 0,
-            "total_playtime_seconds": 0,
-            "total_eapm": 0,
-            "games_with_eapm": 0,
-            "civs_played": defaultdict(int),
-            "civ_wins": defaultdict(int),
-            "civ_losses": defaultdict(int),
-            "civ_games_for_win_rate": defaultdict(int),
-            "units_created": defaultdict(int),
-            "total_units_created": 0,
-            "market_transactions": 0,
-            "total_resource_units_traded": 0,
-            "wall_segments_built": 0,
-            "buildings_deleted": 0,
-            "crucial_researched": defaultdict(int),
-        }
-    )
+    return defaultdict(_new_player_stats)
 
 
 def make_empty_game_stats():
@@ -90,38 +108,43 @@ def accumulate_stats_from_games(games):
         # --- Per-player core stats ---
         all_winners = set()
         all_losers = set()
+        # Sorted roster per team, collected for the matchup stats below
+        id_to_roster = {}
 
         for tid, players in teams.items():
+            roster = []
             for p_info in players:
                 name = p_info["name"]
-                civ = p_info.get("civ", "Unknown")
+                roster.append(name)
+                civ = _intern(p_info.get("civ", "Unknown"))
                 is_winner = p_info.get("winner", False)
                 eapm = p_info.get("eapm")
 
-                player_stats[name]["games_played"] += 1
+                ps = player_stats[name]
+                ps["games_played"] += 1
                 if has_winner:
-                    player_stats[name]["games_for_win_rate"] += 1
+                    ps["games_for_win_rate"] += 1
                 if is_winner:
-                    player_stats[name]["wins"] += 1
+                    ps["wins"] += 1
                     all_winners.add(name)
                 elif has_winner:
                     all_losers.add(name)
 
-                player_stats[name]["total_playtime_seconds"] += duration
+                ps["total_playtime_seconds"] += duration
 
                 if eapm:
-                    player_stats[name]["total_eapm"] += eapm
-                    player_stats[name]["games_with_eapm"] += 1
+                    ps["total_eapm"] += eapm
+                    ps["games_with_eapm"] += 1
 
-                player_stats[name]["civs_played"][civ] += 1
+                ps["civs_played"][civ] += 1
                 game_stats["overall_civ_picks"][civ] += 1
                 if has_winner:
-                    player_stats[name]["civ_games_for_win_rate"][civ] += 1
+                    ps["civ_games_for_win_rate"][civ] += 1
 
                 if is_winner:
-                    player_stats[name]["civ_wins"][civ] += 1
+                    ps["civ_wins"][civ] += 1
                 elif has_winner:
-                    player_stats[name]["civ_losses"][civ] += 1
+                    ps["civ_losses"][civ] += 1
 
                 player_game_chronology[name].append(
                     {
@@ -130,29 +153,21 @@ def accumulate_stats_from_games(games):
                         "timestamp": game.get("datetime", ""),
                     }
                 )
+            roster.sort()
+            id_to_roster[tid] = tuple(roster)
 
         # --- Action-based stats from player_deltas ---
         player_deltas = game.get("player_deltas", {})
         for name, deltas in player_deltas.items():
+            ps = player_stats[name]
+            units_created = ps["units_created"]
             for unit, count in deltas.get("units_created", {}).items():
-                player_stats[name]["units_created"][unit] += count
-            player_stats[name]["total_units_created"] += deltas.get(
-                "total_units_created", 0
-            )
-            player_stats[name]["market_transactions"] += deltas.get(
-                "market_transactions", 0
-            )
-            player_stats[name]["total_resource_units_traded"] += deltas.get(
-                "total_resource_units_traded", 0
-            )
-            player_stats[name]["wall_segments_built"] += deltas.get(
-                "wall_segments_built", 0
-            )
-            player_stats[name]["buildings_deleted"] += deltas.get(
-                "buildings_deleted", 0
-            )
+                units_created[_intern(unit)] += count
+            for key in DELTA_COUNTER_KEYS:
+                ps[key] += deltas.get(key, 0)
+            crucial_researched = ps["crucial_researched"]
             for tech, val in deltas.get("crucial_researched", {}).items():
-                player_stats[name]["crucial_researched"][tech] += val
+                crucial_researched[_intern(tech)] += val
 
         game_level_deltas = game.get("game_level_deltas", {})
         game_stats["total_units_created_overall"] += game_level_deltas.get(
@@ -191,31 +206,18 @@ def accumulate_stats_from_games(games):
 
         # --- Team matchup stats ---
         if has_winner and len(teams) == 2:
-            sorted_tids = sorted(teams.keys())
-            roster_a = tuple(sorted(p["name"] for p in teams[sorted_tids[0]]))
-            roster_b = tuple(sorted(p["name"] for p in teams[sorted_tids[1]]))
-
             # Canonicalize: sort the two rosters so team order is stable
-            if roster_a > roster_b:
-                roster_a, roster_b = roster_b, roster_a
-                swapped = True
-            else:
-                swapped = False
-
-            canonical_rosters = (roster_a, roster_b)
-            matchup_key = str(canonical_rosters)
-
-            if not game_stats["team_matchups"][matchup_key]["rosters"]:
-                game_stats["team_matchups"][matchup_key]["rosters"] = canonical_rosters
+            canonical_rosters = tuple(sorted(id_to_roster.values()))
 
-            winner_is_first_tid = winning_tid == sorted_tids[0]
-            if swapped:
-                winner_is_first_tid = not winner_is_first_tid
+            # The rosters tuple is hashable, so it is the matchup key itself
+            matchup = game_stats["team_matchups"][canonical_rosters]
+            if not matchup["rosters"]:
+                matchup["rosters"] = canonical_rosters
 
-            if winner_is_first_tid:
-                game_stats["team_matchups"][matchup_key]["wins_A"] += 1
+            if id_to_roster.get(winning_tid) == canonical_rosters[0]:
+                matchup["wins_A"] += 1
             else:
-                game_stats["team_matchups"][matchup_key]["wins_B"] += 1
+                matchup["wins_B"] += 1
 
     # --- Calculate losing streaks ---
     _calculate_losing_streaks(player_game_chronology, player_stats)
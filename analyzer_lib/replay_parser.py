@@ -3,13 +3,24 @@
 import re
 from datetime import datetime
 
+_FILENAME_DATETIME_RE = re.compile(r"@(\d{4}\.\d{2}\.\d{2} \d{6})")
+
 
 def get_datetime_from_filename(filename):
     """Extract datetime from replay filename for chronological sorting."""
-    match = re.search(r"@(\d{4}\.\d{2}\.\d{2} \d{6})", filename)
+    match = _FILENAME_DATETIME_RE.search(filename)
     if match:
+        # Fixed-width "YYYY.MM.DD HHMMSS": slice the fields instead of strptime
+        s = match.group(1)
         try:
-            return datetime.strptime(match.group(1), "%Y.%m.%d %H%M%S")
+            return datetime(
+                int(s[0:4]),
+                int(s[5:7]),
+                int(s[8:10]),
+                int(s[11:13]),
+                int(s[13:15]),
+                int(s[15:17]),
+            )
         except ValueError:
             return datetime.min
     return datetime.min
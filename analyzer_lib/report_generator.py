@@ -1,134 +1,145 @@
+import heapq
+import sys
+from operator import itemgetter
+
 from . import config
-from datetime import timedelta
 
+# Units and buildings that don't count towards a player's favorite unit
+EXCLUDED_UNITS = frozenset(
+    {
+        "Palisade Wall",
+        "Stone Wall",
+        "Farm",
+        "Villager",
+        "City Wall",
+        "Goat",
+        "Town Center",
+        "Sheep",
+        "City Gate",
+    }
+)
+
+
+def format_duration(seconds):
+    """Format whole seconds exactly like str(timedelta(seconds=int(seconds))).
 
-def _print_most_balanced_team_matchup(game_stats):
+    Integer divmod avoids building a timedelta just for its string form.
+    """
+    days, rem = divmod(int(seconds), 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    hms = f"{hours}:{minutes:02d}:{secs:02d}"
+    if days:
+        return f"{days} day{'s' if abs(days) != 1 else ''}, {hms}"
+    return hms
+
+
+def _print_most_balanced_team_matchup(lines, game_stats):
     """Prints the most balanced team matchup based on game statistics."""
-    print("\n--- Most Balanced Team Matchup ---")
+    lines.append("\n--- Most Balanced Team Matchup ---")
 
     most_balanced_matchup_data = None
 
-    # Try with MIN_GAMES_FOR_BALANCE = 3
+    # Require 3 games if any matchup has that many, otherwise settle for 1.
+    # One pass scores every matchup with a (win difference, -games, order) key.
     MIN_GAMES_FOR_BALANCE = 3
-    relevant_matchups = {
-        k: v
-        for k, v in game_stats.get("team_matchups", {}).items()
-        if (v.get("wins_A", 0) + v.get("wins_B", 0)) >= MIN_GAMES_FOR_BALANCE
-    }
-
-    if not relevant_matchups:
+    has_relevant_matchup = False
+    scored_matchups = []
+    for i, v in enumerate(game_stats.get("team_matchups", {}).values()):
+        wins_A = v.get("wins_A", 0)
+        wins_B = v.get("wins_B", 0)
+        total_games = wins_A + wins_B
+        if total_games >= MIN_GAMES_FOR_BALANCE:
+            has_relevant_matchup = True
+        # Rosters are stored as a pair of sorted name tuples; skip any matchup
+        # that never got its rosters filled in
+        if total_games >= 1 and len(v.get("rosters", ())) == 2:
+            scored_matchups.append((abs(wins_A - wins_B), -total_games, i, v))
+
+    if not has_relevant_matchup:
         # Try with a lower threshold if no matchups found
         MIN_GAMES_FOR_BALANCE = 1
-        relevant_matchups = {
-            k: v
-            for k, v in game_stats.get("team_matchups", {}).items()
-            if (v.get("wins_A", 0) + v.get("wins_B", 0)) >= MIN_GAMES_FOR_BALANCE
-        }
-
-    if relevant_matchups:
-        # Find the matchup with the smallest win difference, then most games played
-        # Ensure rosters exist and are tuples/lists before processing
-        valid_matchups_for_min = [
-            v
-            for v in relevant_matchups.values()
-            if isinstance(v.get("rosters"), (list, tuple))
-            and len(v["rosters"]) == 2
-            and isinstance(v["rosters"][0], (list, tuple))
-            and isinstance(v["rosters"][1], (list, tuple))
-        ]
-        if valid_matchups_for_min:
-            most_balanced_matchup_data = min(
-                valid_matchups_for_min,
-                key=lambda v: (
-                    abs(v.get("wins_A", 0) - v.get("wins_B", 0)),
-                    -(v.get("wins_A", 0) + v.get("wins_B", 0)),
-                ),
-            )
+    candidates = [
+        scored for scored in scored_matchups if -scored[1] >= MIN_GAMES_FOR_BALANCE
+    ]
+    if candidates:
+        # Smallest win difference, then most games played, then first seen
+        most_balanced_matchup_data = min(candidates)[3]
 
     if most_balanced_matchup_data:
-        team_A_roster = ", ".join(
-            sorted(list(most_balanced_matchup_data["rosters"][0]))
-        )
-        team_B_roster = ", ".join(
-            sorted(list(most_balanced_matchup_data["rosters"][1]))
-        )
+        # Each roster is already a sorted tuple of names
+        team_A_roster = ", ".join(most_balanced_matchup_data["rosters"][0])
+        team_B_roster = ", ".join(most_balanced_matchup_data["rosters"][1])
         wins_A = most_balanced_matchup_data["wins_A"]
         wins_B = most_balanced_matchup_data["wins_B"]
-        print(f"  - Matchup: [{team_A_roster}] vs [{team_B_roster}]")
-        print(f"  - Head-to-head: {wins_A} - {wins_B}")
-        print(f"  - Total Games: {wins_A + wins_B}")
+        lines.append(f"  - Matchup: [{team_A_roster}] vs [{team_B_roster}]")
+        lines.append(f"  - Head-to-head: {wins_A} - {wins_B}")
+        lines.append(f"  - Total Games: {wins_A + wins_B}")
     else:
-        print(
+        lines.append(
             "  - Not enough team games played with consistent rosters (or at all) to determine a balanced matchup."
         )
 
 
-def _print_general_game_statistics(game_stats):
+def _print_general_game_statistics(lines, game_stats):
     """Prints general game statistics like total games, average duration, and longest game."""
-    print("\n--- General Game Statistics ---")
-    print(f"Total Games Analyzed: {game_stats['total_games']}")
+    lines.append("\n--- General Game Statistics ---")
+    lines.append(f"Total Games Analyzed: {game_stats['total_games']}")
     if game_stats["total_games"] > 0:
         avg_duration_seconds = (
             game_stats["total_duration_seconds"] / game_stats["total_games"]
         )
-        avg_duration_str = str(timedelta(seconds=int(avg_duration_seconds)))
-        print(f"Average Game Duration: {avg_duration_str}")
+        avg_duration_str = format_duration(avg_duration_seconds)
+        lines.append(f"Average Game Duration: {avg_duration_str}")
 
-        longest_duration_str = str(
-            timedelta(seconds=int(game_stats["longest_game"]["duration_seconds"]))
+        longest_duration_str = format_duration(
+            game_stats["longest_game"]["duration_seconds"]
         )
         longest_game_file = game_stats["longest_game"]["file"]
-        print(f"Longest Game: {longest_duration_str} (File: {longest_game_file})")
+        lines.append(
+            f"Longest Game: {longest_duration_str} (File: {longest_game_file})"
+        )
+
 
+def _favorite_unit(units_created):
+    """Returns the (unit, count) created most often, ignoring EXCLUDED_UNITS.
 
-def _print_favorite_unit_fanatic(player_stats, game_stats):
+    Ties go to the unit seen first. Returns (None, 0) if nothing is left.
+    """
+    return max(
+        (
+            (unit, count)
+            for unit, count in units_created.items()
+            if unit not in EXCLUDED_UNITS
+        ),
+        key=itemgetter(1),
+        default=(None, 0),
+    )
+
+
+def _print_favorite_unit_fanatic(lines, player_stats, game_stats):
     """Prints the 'Favorite Unit Fanatic' for each player and updates game_stats."""
-    print("\n--- Favorite Unit Fanatic ---")
-    excluded_units = [
-        "Palisade Wall",
-        "Stone Wall",
-        "Farm",
-        "Villager",
-        "City Wall",
-        "Goat",
-        "Town Center",
-        "Sheep",
-        "City Gate",
-    ]
+    lines.append("\n--- Favorite Unit Fanatic ---")
+    fanatic_awards = game_stats["awards"]["favorite_unit_fanatic"]
     for player_name, stats in player_stats.items():
-        if stats["units_created"]:
-            # Filter out excluded units
-            filtered_units = {
-                unit: count
-                for unit, count in stats["units_created"].items()
-                if unit not in excluded_units
-            }
-            if filtered_units:
-                most_common_unit, count = max(
-                    filtered_units.items(), key=lambda item: item[1]
-                )
-                game_stats["awards"]["favorite_unit_fanatic"][player_name] = {
-                    "unit": most_common_unit,
-                    "count": count,
-                }
-                print(f"  - {player_name}: {most_common_unit} ({count} times)")
-            else:
-                game_stats["awards"]["favorite_unit_fanatic"][player_name] = {
-                    "unit": "N/A (Filtered)",
-                    "count": 0,
-                }
-                print(
-                    f"  - {player_name}: N/A (Only created excluded units or no units)"
-                )
+        units_created = stats["units_created"]
+        if not units_created:
+            fanatic_awards[player_name] = {"unit": "N/A", "count": 0}
+            lines.append(f"  - {player_name}: N/A (No unit data)")
+            continue
+
+        most_common_unit, count = _favorite_unit(units_created)
+        if most_common_unit is not None:
+            fanatic_awards[player_name] = {"unit": most_common_unit, "count": count}
+            lines.append(f"  - {player_name}: {most_common_unit} ({count} times)")
         else:
-            game_stats["awards"]["favorite_unit_fanatic"][player_name] = {
-                "unit": "N/A",
-                "count": 0,
-            }
-            print(f"  - {player_name}: N/A (No unit data)")
+            fanatic_awards[player_name] = {"unit": "N/A (Filtered)", "count": 0}
+            lines.append(
+                f"  - {player_name}: N/A (Only created excluded units or no units)"
+            )
 
 
-def _print_bitter_salt_baron(player_stats, game_stats):
+def _print_bitter_salt_baron(lines, player_stats, game_stats):
     """Determines and prints 'The Bitter Salt Baron' (longest losing streak) and updates game_stats."""
     # Determine The Bitter Salt Baron (longest losing streak)
     overall_longest_losing_streak = 0
@@ -143,14 +154,14 @@ def _print_bitter_salt_baron(player_stats, game_stats):
         ):
             salt_baron_players.append(player_name)  # Add to tie list
 
-    print("\n--- The Bitter Salt Baron ---")
+    lines.append("\n--- The Bitter Salt Baron ---")
     if salt_baron_players and overall_longest_losing_streak > 0:
         salt_baron_player_str = ", ".join(salt_baron_players)
         game_stats["awards"]["bitter_salt_baron"] = {
             "player": salt_baron_player_str,
             "streak": overall_longest_losing_streak,
         }
-        print(
+        lines.append(
             f"  {salt_baron_player_str} with a streak of {overall_longest_losing_streak} losses."
         )
     else:
@@ -161,186 +172,151 @@ def _print_bitter_salt_baron(player_stats, game_stats):
             and game_stats["awards"].get("bitter_salt_baron", {}).get("streak", -1) != 0
         ):
             game_stats["awards"]["bitter_salt_baron"] = {"player": "N/A", "streak": 0}
-        print("  No significant losing streaks found or everyone's a winner!")
+        lines.append("  No significant losing streaks found or everyone's a winner!")
 
 
-def _print_wall_street_tycoon_award(player_stats):
-    """Prints 'The Wall Street Tycoon' award for most walls built."""
-    if not player_stats:
-        return
+def _top_two(player_stats, stat_key):
+    """Returns (first, winners, second, runners_up) for a per-player counter.
 
-    unique_wall_counts = sorted(
-        list(
-            set(
-                s["wall_segments_built"]
-                for s in player_stats.values()
-                if s["wall_segments_built"] > 0
-            )
-        ),
-        reverse=True,
+    Single pass over player_stats; players with a zero count are ignored and
+    winner/runner-up names keep player_stats order.
+    """
+    first = second = 0
+    winners = []
+    runners_up = []
+    for player_name, stats in player_stats.items():
+        value = stats[stat_key]
+        if value <= 0:
+            continue
+        if value > first:
+            second, runners_up = first, winners
+            first, winners = value, [player_name]
+        elif value == first:
+            winners.append(player_name)
+        elif value > second:
+            second, runners_up = value, [player_name]
+        elif value == second:
+            runners_up.append(player_name)
+    return first, winners, second, runners_up
+
+
+def _print_wall_street_tycoon_award(lines, player_stats):
+    """Prints 'The Wall Street Tycoon' award for most walls built."""
+    max_walls, winners, second_max_walls, runners_up = _top_two(
+        player_stats, "wall_segments_built"
     )
 
-    if unique_wall_counts:
-        max_walls = unique_wall_counts[0]
-        winners = [
-            p for p, s in player_stats.items() if s["wall_segments_built"] == max_walls
-        ]
-        print('\n--- "The Wall Street Tycoon" Award ---')
+    if winners:
+        lines.append('\n--- "The Wall Street Tycoon" Award ---')
         if len(winners) > 1:
-            print(
+            lines.append(
                 f"A tie for first place: {', '.join(winners)} with {max_walls} wall sections built each!"
             )
         else:
-            print(f"Winner: {winners[0]} with {max_walls} wall sections built!")
-
-        if len(unique_wall_counts) > 1:
-            second_max_walls = unique_wall_counts[1]
-            runners_up = [
-                p
-                for p, s in player_stats.items()
-                if s["wall_segments_built"] == second_max_walls
-            ]
-            if runners_up:
-                if len(runners_up) > 1:
-                    print(
-                        f"  - Second place (tie): {', '.join(runners_up)} with {second_max_walls} each."
-                    )
-                else:
-                    print(f"  - Second place: {runners_up[0]} with {second_max_walls}.")
+            lines.append(f"Winner: {winners[0]} with {max_walls} wall sections built!")
 
+        if runners_up:
+            if len(runners_up) > 1:
+                lines.append(
+                    f"  - Second place (tie): {', '.join(runners_up)} with {second_max_walls} each."
+                )
+            else:
+                lines.append(
+                    f"  - Second place: {runners_up[0]} with {second_max_walls}."
+                )
 
-def _print_demolition_expert_award(player_stats):
-    """Prints 'The Demolition Expert' award for most buildings deleted."""
-    if not player_stats:
-        return
 
-    unique_delete_counts = sorted(
-        list(
-            set(
-                s["buildings_deleted"]
-                for s in player_stats.values()
-                if s["buildings_deleted"] > 0
-            )
-        ),
-        reverse=True,
+def _print_demolition_expert_award(lines, player_stats):
+    """Prints 'The Demolition Expert' award for most buildings deleted."""
+    max_deletes, winners, second_max_deletes, runners_up = _top_two(
+        player_stats, "buildings_deleted"
     )
 
-    if unique_delete_counts:
-        max_deletes = unique_delete_counts[0]
-        winners = [
-            p for p, s in player_stats.items() if s["buildings_deleted"] == max_deletes
-        ]
-        print('\n--- "The Demolition Expert" Award ---')
+    if winners:
+        lines.append('\n--- "The Demolition Expert" Award ---')
         if len(winners) > 1:
-            print(
+            lines.append(
                 f"A tie for first place: {', '.join(winners)} with {max_deletes} buildings deleted each!"
             )
         else:
-            print(f"Winner: {winners[0]} with {max_deletes} buildings deleted!")
-
-        if len(unique_delete_counts) > 1:
-            second_max_deletes = unique_delete_counts[1]
-            runners_up = [
-                p
-                for p, s in player_stats.items()
-                if s["buildings_deleted"] == second_max_deletes
-            ]
-            if runners_up:
-                if len(runners_up) > 1:
-                    print(
-                        f"  - Second place (tie): {', '.join(runners_up)} with {second_max_deletes} each."
-                    )
-                else:
-                    print(
-                        f"  - Second place: {runners_up[0]} with {second_max_deletes}."
-                    )
+            lines.append(f"Winner: {winners[0]} with {max_deletes} buildings deleted!")
 
+        if runners_up:
+            if len(runners_up) > 1:
+                lines.append(
+                    f"  - Second place (tie): {', '.join(runners_up)} with {second_max_deletes} each."
+                )
+            else:
+                lines.append(
+                    f"  - Second place: {runners_up[0]} with {second_max_deletes}."
+                )
 
-def _print_market_mogul_award(player_stats):
-    """Prints 'The Market Mogul' award for most market transactions and units traded."""
-    if not player_stats:
-        return
 
-    unique_transaction_counts = sorted(
-        list(
-            set(
-                s["market_transactions"]
-                for s in player_stats.values()
-                if s["market_transactions"] > 0
-            )
-        ),
-        reverse=True,
+def _print_market_mogul_award(lines, player_stats):
+    """Prints 'The Market Mogul' award for most market transactions and units traded."""
+    max_transactions, winners, second_max_transactions, runners_up = _top_two(
+        player_stats, "market_transactions"
     )
 
-    if unique_transaction_counts:
-        max_transactions = unique_transaction_counts[0]
-        winners = [
-            (p, s.get("total_resource_units_traded", 0))
-            for p, s in player_stats.items()
-            if s["market_transactions"] == max_transactions
-        ]
-        print('\n--- "The Market Mogul" Award ---')
+    if winners:
+        lines.append('\n--- "The Market Mogul" Award ---')
         if len(winners) > 1:
             details = [
-                f"{name} ({player_stats[name]['market_transactions']} transactions, {traded:,} units)"
-                for name, traded in winners
+                f"{name} ({max_transactions} transactions, {player_stats[name].get('total_resource_units_traded', 0):,} units)"
+                for name in winners
             ]
-            print(f"A tie for first place: {', '.join(details)}")
+            lines.append(f"A tie for first place: {', '.join(details)}")
         else:
-            winner_name, units_traded = winners[0]
-            print(
+            winner_name = winners[0]
+            units_traded = player_stats[winner_name].get(
+                "total_resource_units_traded", 0
+            )
+            lines.append(
                 f"Winner: {winner_name} with {max_transactions} transactions, trading a total of {units_traded:,} resource units."
             )
 
-        if len(unique_transaction_counts) > 1:
-            second_max_transactions = unique_transaction_counts[1]
-            runners_up = [
-                (p, s.get("total_resource_units_traded", 0))
-                for p, s in player_stats.items()
-                if s["market_transactions"] == second_max_transactions
-            ]
-            if runners_up:
-                if len(runners_up) > 1:
-                    details = [
-                        f"{name} ({second_max_transactions} transactions, {traded:,} units)"
-                        for name, traded in runners_up
-                    ]
-                    print(f"  - Second place (tie): {', '.join(details)}.")
-                else:
-                    runner_up_name, units_traded = runners_up[0]
-                    print(
-                        f"  - Second place: {runner_up_name} with {second_max_transactions} transactions, trading {units_traded:,} units."
-                    )
-    # Removed the 'else' for no market transactions as it's handled by unique_transaction_counts check
+        if runners_up:
+            if len(runners_up) > 1:
+                details = [
+                    f"{name} ({second_max_transactions} transactions, {player_stats[name].get('total_resource_units_traded', 0):,} units)"
+                    for name in runners_up
+                ]
+                lines.append(f"  - Second place (tie): {', '.join(details)}.")
+            else:
+                runner_up_name = runners_up[0]
+                units_traded = player_stats[runner_up_name].get(
+                    "total_resource_units_traded", 0
+                )
+                lines.append(
+                    f"  - Second place: {runner_up_name} with {second_max_transactions} transactions, trading {units_traded:,} units."
+                )
 
 
-def _print_forgetful_upgrades_award(player_stats):
+def _print_forgetful_upgrades_award(lines, player_stats):
     """Prints the 'Most Likely to Forget Crucial Upgrades' award."""
     if not player_stats:
         return
 
+    crucial_upgrades = config.CRUCIAL_UPGRADES
+    num_crucial_upgrades = len(crucial_upgrades)
+
     forgetful_players_data = []
     for player_name, stats in player_stats.items():
         games_played = stats["games_played"]
         if games_played == 0:
             continue
 
-        total_forget_percentage_sum = 0.0
-        num_crucial_upgrades = len(config.CRUCIAL_UPGRADES)
-        individual_forget_details = {}
-
-        for tech_name in config.CRUCIAL_UPGRADES:
-            researched_count = stats["crucial_researched"].get(tech_name, 0)
-            not_researched_count = games_played - researched_count
-            forget_percentage_for_ranking = (not_researched_count / games_played) * 100
-            researched_percentage_for_details = (
-                researched_count / games_played
-            ) * 100  # Percentage of games researched
-            total_forget_percentage_sum += forget_percentage_for_ranking
-            individual_forget_details[tech_name] = researched_percentage_for_details
-
+        # One researched-count row per player; percentages are derived from it
+        researched_counts = [
+            stats["crucial_researched"].get(tech_name, 0)
+            for tech_name in crucial_upgrades
+        ]
         average_forget_percentage = (
-            total_forget_percentage_sum / num_crucial_upgrades
+            sum(
+                ((games_played - researched_count) / games_played) * 100
+                for researched_count in researched_counts
+            )
+            / num_crucial_upgrades
             if num_crucial_upgrades > 0
             else 0
         )
@@ -348,28 +324,29 @@ def _print_forgetful_upgrades_award(player_stats):
             {
                 "name": player_name,
                 "avg_forget": average_forget_percentage,
-                "details": individual_forget_details,
+                "games_played": games_played,
+                "researched": researched_counts,
             }
         )
 
     # Sort by average forgetfulness, descending
-    forgetful_players_data.sort(key=lambda x: x["avg_forget"], reverse=True)
+    forgetful_players_data.sort(key=itemgetter("avg_forget"), reverse=True)
+
+    def details_str(player):
+        # Percentage of games where each upgrade WAS researched, for clarity
+        return ", ".join(
+            f"{tech}: {(count / player['games_played']) * 100:.0f}%"
+            for tech, count in zip(crucial_upgrades, player["researched"])
+        )
 
     if forgetful_players_data:
-        print('\n--- "Most Likely to Forget Crucial Upgrades" Award ---')
+        lines.append('\n--- "Most Likely to Forget Crucial Upgrades" Award ---')
         # Winner
         winner = forgetful_players_data[0]
-        # Details show percentage of games where upgrade WAS researched for clarity
-        winner_details_str = ", ".join(
-            [
-                f"{tech}: {winner['details'][tech]:.0f}%"
-                for tech in config.CRUCIAL_UPGRADES
-            ]
-        )
-        print(
+        lines.append(
             f"Winner: {winner['name']} (Average Forgetfulness: {winner['avg_forget']:.1f}%)"
         )
-        print(f"  - Details (% Researched): {winner_details_str} of games.")
+        lines.append(f"  - Details (% Researched): {details_str(winner)} of games.")
 
         # Runner-up
         if len(forgetful_players_data) > 1:
@@ -379,21 +356,15 @@ def _print_forgetful_upgrades_award(player_stats):
                 runner_up["avg_forget"] < winner["avg_forget"]
                 and runner_up["avg_forget"] > 0
             ):
-                runner_up_details_str = ", ".join(
-                    [
-                        f"{tech}: {runner_up['details'][tech]:.0f}%"
-                        for tech in config.CRUCIAL_UPGRADES
-                    ]
-                )
-                print(
+                lines.append(
                     f"  - Second place: {runner_up['name']} (Average Forgetfulness: {runner_up['avg_forget']:.1f}%)"
                 )
-                print(
-                    f"    - Details (% Researched): {runner_up_details_str} of games."
+                lines.append(
+                    f"    - Details (% Researched): {details_str(runner_up)} of games."
                 )
 
 
-def _print_apm_award(player_stats):
+def _print_apm_award(lines, player_stats):
     """Prints "The Jittery Caffeinated Fingers" award for the highest average eAPM."""
     apm_data = []
     for player_name, stats in player_stats.items():
@@ -405,70 +376,71 @@ def _print_apm_award(player_stats):
         return
 
     # Sort by average eAPM descending
-    apm_data.sort(key=lambda x: x["avg_eapm"], reverse=True)
+    apm_data.sort(key=itemgetter("avg_eapm"), reverse=True)
 
-    print('\n--- "The Jittery Caffeinated Fingers" Award (Highest eAPM) ---')
+    lines.append('\n--- "The Jittery Caffeinated Fingers" Award (Highest eAPM) ---')
     winner = apm_data[0]
-    print(f"Winner: {winner['name']} with an average of {winner['avg_eapm']:.0f} eAPM!")
+    lines.append(
+        f"Winner: {winner['name']} with an average of {winner['avg_eapm']:.0f} eAPM!"
+    )
 
     if len(apm_data) > 1:
         runner_up = apm_data[1]
-        print(
+        lines.append(
             f"  - Second place: {runner_up['name']} with {runner_up['avg_eapm']:.0f} eAPM."
         )
 
 
-def _print_player_leaderboard(player_stats):
-    """Prints the player leaderboard with core statistics."""
-    print("\n--- Player Leaderboard & Stats ---")
-    # Sort by win rate (desc), then wins (desc), then games played (desc)
-    sorted_players = sorted(
-        player_stats.items(),
-        key=lambda item: (
-            item[1]["wins"] / item[1]["games_for_win_rate"]
-            if item[1].get("games_for_win_rate", 0) > 0
-            else 0,
-            item[1]["wins"],
-            item[1]["games_played"],
-        ),
-        reverse=True,
-    )
+def _rank_players(player_stats):
+    """Returns (player_name, stats, win_rate) ranked by win rate, wins, games played.
 
-    for player_name, stats in sorted_players:
-        games_for_win_rate = stats.get("games_for_win_rate", 0)
-        win_rate = (
-            (stats["wins"] / games_for_win_rate * 100) if games_for_win_rate > 0 else 0
+    win_rate is the 0-1 fraction of games with a winner that the player won,
+    computed once here and reused by the report rows.
+    """
+    ranked = [
+        (
+            (
+                stats["wins"] / stats["games_for_win_rate"]
+                if stats.get("games_for_win_rate", 0) > 0
+                else 0
+            ),
+            stats["wins"],
+            stats["games_played"],
+            player_name,
+            stats,
         )
-        playtime_str = str(timedelta(seconds=int(stats["total_playtime_seconds"])))
+        for player_name, stats in player_stats.items()
+    ]
+    ranked.sort(key=itemgetter(0, 1, 2), reverse=True)
+    return [
+        (player_name, stats, win_rate) for win_rate, _, _, player_name, stats in ranked
+    ]
 
-        print(f"\n- {player_name}:")
-        print(f"  - Games Played: {stats['games_played']}")
-        print(
-            f"  - Wins: {stats['wins']} (Win Rate: {win_rate:.1f}% based on {games_for_win_rate} games with a determined winner)"
+
+def _print_player_leaderboard(lines, ranked_players):
+    """Prints the player leaderboard with core statistics."""
+    lines.append("\n--- Player Leaderboard & Stats ---")
+    for player_name, stats, win_rate in ranked_players:
+        games_for_win_rate = stats.get("games_for_win_rate", 0)
+        win_rate_pct = win_rate * 100
+        playtime_str = format_duration(stats["total_playtime_seconds"])
+
+        lines.append(f"\n- {player_name}:")
+        lines.append(f"  - Games Played: {stats['games_played']}")
+        lines.append(
+            f"  - Wins: {stats['wins']} (Win Rate: {win_rate_pct:.1f}% based on {games_for_win_rate} games with a determined winner)"
         )
-        print(f"  - Total Playtime: {playtime_str}")
+        lines.append(f"  - Total Playtime: {playtime_str}")
 
 
-def _print_player_civilization_performance(player_stats):
+def _print_player_civilization_performance(lines, ranked_players):
     """Prints civilization performance statistics for each player."""
-    print("\n--- Player Civilization Performance ---")
-    # Sort players the same way as in the leaderboard for consistent ordering
-    sorted_players = sorted(
-        player_stats.items(),
-        key=lambda item: (
-            item[1]["wins"] / item[1]["games_for_win_rate"]
-            if item[1].get("games_for_win_rate", 0) > 0
-            else 0,
-            item[1]["wins"],
-            item[1]["games_played"],
-        ),
-        reverse=True,
-    )
-
-    for player_name, stats in sorted_players:
-        print(f"\n- {player_name}:")
+    lines.append("\n--- Player Civilization Performance ---")
+    # Same ordering as the leaderboard for consistency
+    for player_name, stats, _ in ranked_players:
+        lines.append(f"\n- {player_name}:")
         if not stats["civs_played"]:
-            print("  - No civilization data available.")
+            lines.append("  - No civilization data available.")
             continue
 
         # Find the highest play count for this player's civs
@@ -478,7 +450,7 @@ def _print_player_civilization_performance(player_stats):
             civ for civ, count in stats["civs_played"].items() if count == max_played
         ]
 
-        print("  - Most Played Civ(s):")
+        lines.append("  - Most Played Civ(s):")
         for civ in most_played_civs:
             wins = stats["civ_wins"].get(civ, 0)
             civ_games_for_win_rate = stats["civ_games_for_win_rate"].get(civ, 0)
@@ -488,79 +460,82 @@ def _print_player_civilization_performance(player_stats):
                 else 0
             )
             # 'count' is the total number of times the civ was played
-            print(
+            lines.append(
                 f"    - {civ}: {stats['civs_played'][civ]} game(s), {civ_win_rate:.1f}% win rate (based on {civ_games_for_win_rate} games with a determined winner)"
             )
 
 
-def _print_overall_civilization_popularity(game_stats):
+def _print_overall_civilization_popularity(lines, game_stats):
     """Prints the top 10 most popular civilizations overall."""
-    print("\n--- Top 10 Most Popular Civilizations ---")
-    sorted_civs = sorted(
-        game_stats["overall_civ_picks"].items(), key=lambda item: item[1], reverse=True
+    lines.append("\n--- Top 10 Most Popular Civilizations ---")
+    top_civs = heapq.nlargest(
+        10, game_stats["overall_civ_picks"].items(), key=itemgetter(1)
     )
-    print("Most Picked Civilizations Overall:")
-    for i, (civ, count) in enumerate(sorted_civs):
-        if i >= 10:
-            break
-        print(f"  - {civ}: {count} times")
+    lines.append("Most Picked Civilizations Overall:")
+    for civ, count in top_civs:
+        lines.append(f"  - {civ}: {count} times")
 
 
 def print_report(player_stats, game_stats):
-    """Prints the final analytics report."""
-    print("\n--- Analysis Complete ---")
-    print("\nLAN Party Analytics Report")
+    """Prints the final analytics report.
+
+    The section printers append to one list of lines that is written to
+    stdout in a single write, instead of one write per line. Whatever was
+    collected is still written if a section raises.
+    """
+    lines = []
+    try:
+        _print_report_sections(lines, player_stats, game_stats)
+    finally:
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
 
-    _print_general_game_statistics(game_stats)
 
-    _print_favorite_unit_fanatic(player_stats, game_stats)
+def _print_report_sections(lines, player_stats, game_stats):
+    """Appends every section of the analytics report to lines, in order."""
+    lines.append("\n--- Analysis Complete ---")
+    lines.append("\nLAN Party Analytics Report")
 
-    _print_most_balanced_team_matchup(game_stats)
+    _print_general_game_statistics(lines, game_stats)
+
+    _print_favorite_unit_fanatic(lines, player_stats, game_stats)
+
+    _print_most_balanced_team_matchup(lines, game_stats)
 
     # --- AWARDS SECTION ---
-    _print_wall_street_tycoon_award(player_stats)
+    _print_wall_street_tycoon_award(lines, player_stats)
 
-    _print_demolition_expert_award(player_stats)
+    _print_demolition_expert_award(lines, player_stats)
 
-    _print_market_mogul_award(player_stats)
+    _print_market_mogul_award(lines, player_stats)
 
-    _print_forgetful_upgrades_award(player_stats)
+    _print_forgetful_upgrades_award(lines, player_stats)
 
-    _print_apm_award(player_stats)
+    _print_apm_award(lines, player_stats)
 
-    _print_bitter_salt_baron(player_stats, game_stats)  # Moved here
+    _print_bitter_salt_baron(lines, player_stats, game_stats)  # Moved here
 
-    _print_player_leaderboard(player_stats)
+    # Sort by win rate (desc), then wins (desc), then games played (desc)
+    ranked_players = _rank_players(player_stats)
 
-    _print_player_civilization_performance(player_stats)
+    _print_player_leaderboard(lines, ranked_players)
 
-    _print_overall_civilization_popularity(game_stats)
+    _print_player_civilization_performance(lines, ranked_players)
 
+    _print_overall_civilization_popularity(lines, game_stats)
 
-# --- Pure data computation functions for web API ---
 
-EXCLUDED_UNITS = {
-    "Palisade Wall",
-    "Stone Wall",
-    "Farm",
-    "Villager",
-    "City Wall",
-    "Goat",
-    "Town Center",
-    "Sheep",
-    "City Gate",
-}
+# --- Pure data computation functions for web API ---
 
 
 def _compute_ranked_stat(player_stats, stat_key):
     """Generic helper for awards that rank by a single stat (walls, buildings deleted, etc.)."""
-    entries = [
-        {"player": p, "count": s[stat_key]}
-        for p, s in player_stats.items()
-        if s[stat_key] > 0
-    ]
-    entries.sort(key=lambda x: x["count"], reverse=True)
-    return entries[:2]
+    top_two = heapq.nlargest(
+        2,
+        ((p, s[stat_key]) for p, s in player_stats.items() if s[stat_key] > 0),
+        key=itemgetter(1),
+    )
+    return [{"player": p, "count": count} for p, count in top_two]
 
 
 def _compute_favorite_unit_fanatic(player_stats):
@@ -568,13 +543,10 @@ def _compute_favorite_unit_fanatic(player_stats):
     for player_name, stats in player_stats.items():
         if not stats["units_created"]:
             continue
-        filtered = {
-            u: c for u, c in stats["units_created"].items() if u not in EXCLUDED_UNITS
-        }
-        if filtered:
-            unit, count = max(filtered.items(), key=lambda x: x[1])
+        unit, count = _favorite_unit(stats["units_created"])
+        if unit is not None:
             result.append({"player": player_name, "unit": unit, "count": count})
-    result.sort(key=lambda x: x["count"], reverse=True)
+    result.sort(key=itemgetter("count"), reverse=True)
     return result
 
 
@@ -584,7 +556,7 @@ def _compute_bitter_salt_baron(player_stats):
         for p, s in player_stats.items()
         if s.get("max_losing_streak", 0) > 0
     ]
-    entries.sort(key=lambda x: x["streak"], reverse=True)
+    entries.sort(key=itemgetter("streak"), reverse=True)
     return entries[:2]
 
 
@@ -598,11 +570,15 @@ def _compute_market_mogul(player_stats):
         for p, s in player_stats.items()
         if s["market_transactions"] > 0
     ]
-    entries.sort(key=lambda x: x["transactions"], reverse=True)
+    entries.sort(key=itemgetter("transactions"), reverse=True)
     return entries[:2]
 
 
 def _compute_forgetful_upgrades(player_stats):
+    crucial_upgrades = config.CRUCIAL_UPGRADES
+    num_upgrades = len(crucial_upgrades)
+    if num_upgrades == 0:
+        return []
     result = []
     for player_name, stats in player_stats.items():
         if not player_name:
@@ -610,13 +586,11 @@ def _compute_forgetful_upgrades(player_stats):
         gp = stats["games_played"]
         if gp < 5:
             continue
-        num_upgrades = len(config.CRUCIAL_UPGRADES)
-        if num_upgrades == 0:
-            continue
+        crucial_researched = stats["crucial_researched"]
         total_forget = 0.0
         details = {}
-        for tech in config.CRUCIAL_UPGRADES:
-            researched = stats["crucial_researched"].get(tech, 0)
+        for tech in crucial_upgrades:
+            researched = crucial_researched.get(tech, 0)
             forget_pct = ((gp - researched) / gp) * 100
             total_forget += forget_pct
             details[tech] = round((researched / gp) * 100, 1)
@@ -628,7 +602,7 @@ def _compute_forgetful_upgrades(player_stats):
                 "details": details,
             }
         )
-    result.sort(key=lambda x: x["avg_forgetfulness"], reverse=True)
+    result.sort(key=itemgetter("avg_forgetfulness"), reverse=True)
     return result[:2]
 
 
@@ -641,7 +615,7 @@ def _compute_apm_award(player_stats):
             continue
         avg = stats["total_eapm"] / stats["games_with_eapm"]
         entries.append({"player": player_name, "avg_eapm": round(avg, 1)})
-    entries.sort(key=lambda x: x["avg_eapm"], reverse=True)
+    entries.sort(key=itemgetter("avg_eapm"), reverse=True)
     return entries[:2]
 
 
@@ -650,10 +624,7 @@ def _compute_most_balanced_matchup(game_stats):
     valid = [
         v
         for v in game_stats.get("team_matchups", {}).values()
-        if isinstance(v.get("rosters"), (list, tuple))
-        and len(v["rosters"]) == 2
-        and isinstance(v["rosters"][0], (list, tuple))
-        and isinstance(v["rosters"][1], (list, tuple))
+        if len(v.get("rosters", ())) == 2
         and v.get("wins_A", 0) >= 1
         and v.get("wins_B", 0) >= 1
     ]
@@ -664,8 +635,8 @@ def _compute_most_balanced_matchup(game_stats):
         key=lambda v: (abs(v["wins_A"] - v["wins_B"]), -(v["wins_A"] + v["wins_B"])),
     )
     return {
-        "team_a": sorted(list(best["rosters"][0])),
-        "team_b": sorted(list(best["rosters"][1])),
+        "team_a": list(best["rosters"][0]),
+        "team_b": list(best["rosters"][1]),
         "wins_a": best["wins_A"],
         "wins_b": best["wins_B"],
     }
@@ -682,7 +653,7 @@ def _compute_cheat_code(player_stats, min_games=60):
         entries.append(
             {"player": p, "win_rate": win_rate, "wins": s["wins"], "games": gfwr}
         )
-    entries.sort(key=lambda x: (x["win_rate"], x["wins"]), reverse=True)
+    entries.sort(key=itemgetter("win_rate", "wins"), reverse=True)
     return entries[:3]
 
 
@@ -702,13 +673,13 @@ def _compute_rating_movers(game_results):
         for p, total in totals.items()
         if total > 0
     ]
-    stonks.sort(key=lambda x: x["rating_gain"], reverse=True)
+    stonks.sort(key=itemgetter("rating_gain"), reverse=True)
     not_stonks = [
         {"player": p, "rating_loss": round(abs(total), 1)}
         for p, total in totals.items()
         if total < 0
     ]
-    not_stonks.sort(key=lambda x: x["rating_loss"], reverse=True)
+    not_stonks.sort(key=itemgetter("rating_loss"), reverse=True)
     return stonks[:3], not_stonks[:3]
 
 
@@ -738,28 +709,24 @@ def compute_general_stats(game_stats):
     """Compute general game statistics as structured data for the web API."""
     total = game_stats["total_games"]
     avg_dur = game_stats["total_duration_seconds"] / total if total > 0 else 0
-    sorted_civs = sorted(
-        game_stats["overall_civ_picks"].items(), key=lambda x: x[1], reverse=True
+    top_civs = heapq.nlargest(
+        10, game_stats["overall_civ_picks"].items(), key=itemgetter(1)
     )
     return {
         "total_games": total,
         "total_duration_seconds": game_stats["total_duration_seconds"],
-        "total_duration_display": str(
-            timedelta(seconds=int(game_stats["total_duration_seconds"]))
-        ),
+        "total_duration_display": format_duration(game_stats["total_duration_seconds"]),
         "avg_duration_seconds": avg_dur,
-        "avg_duration_display": str(timedelta(seconds=int(avg_dur))),
+        "avg_duration_display": format_duration(avg_dur),
         "longest_game": {
             "duration_seconds": game_stats["longest_game"]["duration_seconds"],
-            "duration_display": str(
-                timedelta(seconds=int(game_stats["longest_game"]["duration_seconds"]))
+            "duration_display": format_duration(
+                game_stats["longest_game"]["duration_seconds"]
             ),
             "file": game_stats["longest_game"]["file"],
         },
         "total_units_created": game_stats["total_units_created_overall"],
-        "civ_popularity": [
-            {"name": name, "picks": count} for name, count in sorted_civs[:10]
-        ],
+        "civ_popularity": [{"name": name, "picks": count} for name, count in top_civs],
     }
 
 
@@ -796,15 +763,13 @@ def compute_player_profiles(player_stats, head_to_head):
                     "win_rate": round(civ_wr, 1),
                 }
             )
-        civs.sort(key=lambda c: c["games"], reverse=True)
+        civs.sort(key=itemgetter("games"), reverse=True)
 
         # Top units
         filtered_units = {
             u: c for u, c in stats["units_created"].items() if u not in EXCLUDED_UNITS
         }
-        top_units = sorted(filtered_units.items(), key=lambda x: x[1], reverse=True)[
-            :10
-        ]
+        top_units = sorted(filtered_units.items(), key=itemgetter(1), reverse=True)[:10]
 
         # Head-to-head
         h2h = []
@@ -820,7 +785,7 @@ def compute_player_profiles(player_stats, head_to_head):
                             "games": total,
                         }
                     )
-            h2h.sort(key=lambda x: x["games"], reverse=True)
+            h2h.sort(key=itemgetter("games"), reverse=True)
 
         profiles[name] = {
             "name": name,
@@ -829,9 +794,7 @@ def compute_player_profiles(player_stats, head_to_head):
             "games_for_win_rate": gfwr,
             "win_rate": round(win_rate, 1),
             "total_playtime_seconds": stats["total_playtime_seconds"],
-            "total_playtime_display": str(
-                timedelta(seconds=int(stats["total_playtime_seconds"]))
-            ),
+            "total_playtime_display": format_duration(stats["total_playtime_seconds"]),
             "avg_eapm": round(avg_eapm, 1) if avg_eapm else None,
             "max_losing_streak": stats.get("max_losing_streak", 0),
             "total_units_created": stats["total_units_created"],
@@ -15,6 +15,10 @@ sys.path.append(PROJECT_ROOT)
 
 from analyzer_lib import config
 
+# Plots are only ever written to files, so default matplotlib to the Agg
+# backend once for the whole process (an explicit MPLBACKEND still wins)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -24,6 +28,7 @@ PLOT_MIN_GAMES_THRESHOLD = (
     if hasattr(config, "PLOT_MIN_GAMES_THRESHOLD")
     else 5
 )
+ELO_SCALING_FACTOR = config.TRUESKILL_ELO_SCALING_FACTOR
 
 
 class PlayerRating:
@@ -45,7 +50,7 @@ class PlayerRating:
         self.games_rated += 1
 
     def get_scaled_mu(self) -> float:
-        return self.rating.mu * config.TRUESKILL_ELO_SCALING_FACTOR
+        return self.rating.mu * ELO_SCALING_FACTOR
 
     def get_confidence_percent(self, initial_unscaled_sigma: float) -> float:
         if initial_unscaled_sigma == 0:
@@ -136,18 +141,21 @@ class GameData:
 
     def is_valid_for_rating(self) -> bool:
         if self.winning_team_id is None:
-            logging.debug(f"Game {self.filename} invalid for rating: No clear winner.")
+            logging.debug("Game %s invalid for rating: No clear winner.", self.filename)
             return False
         if len(self.teams_data) != 2:
             logging.debug(
-                f"Game {self.filename} invalid for rating: Not exactly 2 teams (found {len(self.teams_data)})."
+                "Game %s invalid for rating: Not exactly 2 teams (found %d).",
+                self.filename,
+                len(self.teams_data),
             )
             return False
 
         team_player_lists = list(self.teams_data.values())
         if not team_player_lists[0] or not team_player_lists[1]:
             logging.debug(
-                f"Game {self.filename} invalid for rating: At least one team has zero players."
+                "Game %s invalid for rating: At least one team has zero players.",
+                self.filename,
             )
             return False
         return True
@@ -162,39 +170,41 @@ class TrueSkillCalculator:
         self.ts_env = trueskill.TrueSkill(
             mu=mu, sigma=sigma, beta=beta, tau=tau, draw_probability=draw_probability
         )
+        # Ratings are never mutated in place (rate() returns new ones), so
+        # every new player can start from the same initial Rating object
+        self._initial_rating = self.ts_env.create_rating()
         self.player_ratings: Dict[str, PlayerRating] = {}
         self.rating_history: List[Dict[str, Any]] = []
 
     def get_or_create_player_rating(self, player_name: str) -> PlayerRating:
-        if player_name not in self.player_ratings:
-            self.player_ratings[player_name] = PlayerRating(
-                player_name, self.ts_env.create_rating()
-            )
-        return self.player_ratings[player_name]
+        player_rating = self.player_ratings.get(player_name)
+        if player_rating is None:
+            player_rating = PlayerRating(player_name, self._initial_rating)
+            self.player_ratings[player_name] = player_rating
+        return player_rating
 
     def update_ratings_for_game(
         self, game_data: GameData, game_index: int, sha256: str = ""
     ) -> Dict[str, float]:
         """Update ratings for all players in a game.
 
+        The game must already have passed is_valid_for_rating() (exactly two
+        teams); the teams are unpacked up front and anything else raises.
         Returns a dict mapping player_name -> rating delta (scaled mu change).
-        Returns empty dict on error.
+        If the TrueSkill update fails, the error is logged and whatever deltas
+        were recorded before it (usually none) are returned.
         """
-        team_ids = list(game_data.teams_data.keys())
-        team1_id, team2_id = team_ids[0], team_ids[1]
-
-        team1_player_objs = game_data.teams_data[team1_id]
-        team2_player_objs = game_data.teams_data[team2_id]
+        teams = game_data.teams_data.items()
+        (team1_id, team1_player_objs), (team2_id, team2_player_objs) = teams
 
         player_handicaps = game_data.get_player_handicaps()
 
-        team1_ratings_dict = {
-            p.name: self.get_or_create_player_rating(p.name).rating
-            for p in team1_player_objs
+        # Look each player up once and keep the PlayerRating for the update
+        team1_ratings = {
+            p.name: self.get_or_create_player_rating(p.name) for p in team1_player_objs
         }
-        team2_ratings_dict = {
-            p.name: self.get_or_create_player_rating(p.name).rating
-            for p in team2_player_objs
+        team2_ratings = {
+            p.name: self.get_or_create_player_rating(p.name) for p in team2_player_objs
         }
 
         if game_data.winning_team_id == team1_id:
@@ -202,51 +212,52 @@ class TrueSkillCalculator:
         else:
             ranks = [1, 0]
 
+        scale = ELO_SCALING_FACTOR
+        # Checked once per game so the per-player debug line isn't formatted
+        # when it would be discarded anyway
+        log_updates = logging.getLogger().isEnabledFor(logging.DEBUG)
         deltas = {}
         try:
+            # rate() takes plain rating lists and returns new ratings in the
+            # same positions, so results pair back with zip() instead of by name
+            team_ratings = (list(team1_ratings.values()), list(team2_ratings.values()))
             new_ratings_by_team = self.ts_env.rate(
-                [team1_ratings_dict, team2_ratings_dict], ranks=ranks
-            )
-
-            updated_team1_ratings_map, updated_team2_ratings_map = (
-                new_ratings_by_team[0],
-                new_ratings_by_team[1],
+                [[pr.rating for pr in team] for team in team_ratings], ranks=ranks
             )
 
-            for player_name, updated_map in [
-                *[(n, updated_team1_ratings_map) for n in team1_ratings_dict],
-                *[(n, updated_team2_ratings_map) for n in team2_ratings_dict],
-            ]:
-                player_rating_obj = self.get_or_create_player_rating(player_name)
+            updates = [
+                item
+                for team, new_ratings in zip(team_ratings, new_ratings_by_team)
+                for item in zip(team, new_ratings)
+            ]
+            for player_rating_obj, new_rating in updates:
+                player_name = player_rating_obj.name
                 player_rating_obj.increment_games_rated()
-                old_mu_scaled = player_rating_obj.get_scaled_mu()
-                old_sigma_scaled = (
-                    player_rating_obj.rating.sigma * config.TRUESKILL_ELO_SCALING_FACTOR
-                )
+                old_rating = player_rating_obj.rating
+                old_mu_scaled = old_rating.mu * scale
+                old_sigma_scaled = old_rating.sigma * scale
 
-                player_rating_obj.update_rating(updated_map[player_name])
+                player_rating_obj.update_rating(new_rating)
 
-                new_mu_scaled = player_rating_obj.get_scaled_mu()
-                new_sigma_scaled = (
-                    player_rating_obj.rating.sigma * config.TRUESKILL_ELO_SCALING_FACTOR
-                )
+                new_mu_scaled = new_rating.mu * scale
+                new_sigma_scaled = new_rating.sigma * scale
                 delta_mu = new_mu_scaled - old_mu_scaled
                 delta_sigma = new_sigma_scaled - old_sigma_scaled
                 deltas[player_name] = round(delta_mu, 2)
                 handicap = player_handicaps.get(player_name, 100)
-                handicap_str = f" [Handicap: {handicap}%]" if handicap > 100 else ""
-                logging.debug(
-                    f"Update | Game: {game_data.filename} | Player: {player_name:<15}{handicap_str} | "
-                    f"mu: {old_mu_scaled:7.2f} -> {new_mu_scaled:7.2f} ({delta_mu:+.2f}) | "
-                    f"sigma: {old_sigma_scaled:6.2f} -> {new_sigma_scaled:6.2f} ({delta_sigma:+.2f})"
-                )
+                if log_updates:
+                    handicap_str = f" [Handicap: {handicap}%]" if handicap > 100 else ""
+                    logging.debug(
+                        f"Update | Game: {game_data.filename} | Player: {player_name:<15}{handicap_str} | "
+                        f"mu: {old_mu_scaled:7.2f} -> {new_mu_scaled:7.2f} ({delta_mu:+.2f}) | "
+                        f"sigma: {old_sigma_scaled:6.2f} -> {new_sigma_scaled:6.2f} ({delta_sigma:+.2f})"
+                    )
                 self.rating_history.append(
                     {
                         "game_index": game_index,
                         "player_name": player_name,
-                        "mu": player_rating_obj.get_scaled_mu(),
-                        "sigma": player_rating_obj.rating.sigma
-                        * config.TRUESKILL_ELO_SCALING_FACTOR,
+                        "mu": new_mu_scaled,
+                        "sigma": new_sigma_scaled,
                         "handicap": handicap,
                         "datetime": game_data.datetime_obj,
                         "sha256": sha256,
@@ -290,42 +301,46 @@ class ReportGenerator:
             p for p in all_players_sorted if p.games_rated < min_games_for_ranking
         ]
 
-        print(
+        lines = [
             "\n--- Final TrueSkill Player Rankings ({} or more games) ---".format(
                 min_games_for_ranking
-            )
-        )
-        print("  Rank  Player               Mu (mu)    Confidence   Games")
-        print("  -------------------------------------------------------------")
+            ),
+            "  Rank  Player               Mu (mu)    Confidence   Games",
+            "  -------------------------------------------------------------",
+        ]
         if not ranked_players:
-            print("  No players meet the minimum game requirement for ranking.")
+            lines.append("  No players meet the minimum game requirement for ranking.")
         else:
             for i, p_rating in enumerate(ranked_players):
                 mu_scaled = p_rating.get_scaled_mu()
                 confidence = p_rating.get_confidence_percent(
                     self.initial_unscaled_sigma
                 )
-                print(
+                lines.append(
                     f"  {i+1:<5} {p_rating.name:<20} {mu_scaled:<10.2f} {confidence:>9.1f}%   {p_rating.games_played:>5}"
                 )
 
         if provisional_players:
-            print(
+            lines.append(
                 "\n--- Provisional Ratings (Less than {} games) ---".format(
                     min_games_for_ranking
                 )
             )
-            print("        Player               Mu (mu)    Confidence   Games")
-            print("  -------------------------------------------------------------")
+            lines.append("        Player               Mu (mu)    Confidence   Games")
+            lines.append(
+                "  -------------------------------------------------------------"
+            )
             for p_rating in provisional_players:
                 mu_scaled = p_rating.get_scaled_mu()
                 confidence = p_rating.get_confidence_percent(
                     self.initial_unscaled_sigma
                 )
-                print(
+                lines.append(
                     f"        {p_rating.name:<20} {mu_scaled:<10.2f} {confidence:>9.1f}%   {p_rating.games_played:>5}"
                 )
-        print("\n  Higher Confidence indicates a more stable Mu rating.")
+        lines.append("\n  Higher Confidence indicates a more stable Mu rating.")
+        # One print for the whole table instead of one per row
+        print("\n".join(lines))
 
     def plot_rating_evolution(
         self,
@@ -343,9 +358,9 @@ class ReportGenerator:
 
         df = pd.DataFrame(rating_history)
         plt.style.use("seaborn-v0_8-whitegrid")
-        plt.figure(figsize=(18, 10))
 
-        player_game_counts = df.groupby("player_name")["game_index"].nunique()
+        # One history row per player per rated game, so row counts are game counts
+        player_game_counts = df.groupby("player_name", sort=False).size()
         players_to_plot = player_game_counts[
             player_game_counts > self.plot_min_games_threshold
         ].index
@@ -357,19 +372,13 @@ class ReportGenerator:
             )
             return
 
-        plt.figure(figsize=(15, 10))
+        # Style and palette must be set before the axes are created
         sns.set_style("whitegrid")
         sns.set_palette("tab20")
-
-        df_plot = df[df["player_name"].isin(players_to_plot)]
-
-        if df_plot.empty:
-            logging.info("No players meet the minimum game threshold for plotting.")
-            plt.close()
-            return
+        fig, ax = plt.subplots(figsize=(15, 10))
 
         sns.lineplot(
-            data=df_plot,
+            data=df_filtered,
             x="game_index",
             y="mu",
             hue="player_name",
@@ -377,43 +386,44 @@ class ReportGenerator:
             markers=True,
             dashes=False,
             linewidth=2.5,
+            ax=ax,
         )
 
-        for player_name_val in df_filtered["player_name"].unique():
-            player_data = df_filtered[df_filtered["player_name"] == player_name_val]
-            plt.fill_between(
+        # One groupby pass instead of a boolean mask over the frame per player;
+        # sort=False keeps first-seen order so band colors match the lines
+        for _, player_data in df_filtered.groupby("player_name", sort=False):
+            ax.fill_between(
                 player_data["game_index"],
                 player_data["mu"] - player_data["sigma"],
                 player_data["mu"] + player_data["sigma"],
                 alpha=0.2,
             )
 
-        plt.title("TrueSkill Rating Evolution", fontsize=18, fontweight="bold")
-        plt.xlabel("Game Index (Chronological)", fontsize=14)
-        plt.ylabel(
+        ax.set_title("TrueSkill Rating Evolution", fontsize=18, fontweight="bold")
+        ax.set_xlabel("Game Index (Chronological)", fontsize=14)
+        ax.set_ylabel(
             f"TrueSkill Rating (Scaled by {self.elo_scaling_factor})", fontsize=14
         )
-        plt.legend(
+        ax.legend(
             title="Player",
             bbox_to_anchor=(1.05, 1),
             loc="upper left",
             borderaxespad=0.0,
         )
-        plt.xticks(fontsize=12)
-        plt.yticks(fontsize=12)
-        plt.grid(True, which="both", linestyle="--", linewidth=0.5)
+        ax.tick_params(axis="both", labelsize=12)
+        ax.grid(True, which="both", linestyle="--", linewidth=0.5)
 
         if lan_events:
-            y_min, y_max = plt.ylim()
+            y_min, y_max = ax.get_ylim()
             for event in lan_events:
-                plt.axvspan(
+                ax.axvspan(
                     event["game_index_start"] - 0.5,
                     event["game_index_end"] + 0.5,
                     alpha=0.08,
                     color="#c9a84c",
                     zorder=0,
                 )
-                plt.axvline(
+                ax.axvline(
                     x=event["game_index_start"],
                     color="#c9a84c",
                     linestyle="--",
@@ -422,7 +432,7 @@ class ReportGenerator:
                     zorder=1,
                 )
                 mid = (event["game_index_start"] + event["game_index_end"]) / 2
-                plt.text(
+                ax.text(
                     mid,
                     y_max - (y_max - y_min) * 0.02,
                     event["label"],
@@ -434,18 +444,18 @@ class ReportGenerator:
                     rotation=90,
                 )
 
-        plt.tight_layout(rect=[0, 0, 0.85, 1])
+        fig.tight_layout(rect=[0, 0, 0.85, 1])
 
         try:
             plot_dir = os.path.join(PROJECT_ROOT, "plots")
             os.makedirs(plot_dir, exist_ok=True)
             plot_path = os.path.join(plot_dir, output_filename)
-            plt.savefig(plot_path)
+            fig.savefig(plot_path)
             logging.info(f"Rating evolution plot saved to: {plot_path}")
         except Exception as e:
             logging.error(f"Error saving plot: {e}")
         finally:
-            plt.close()
+            plt.close(fig)
 
 
 def detect_lan_events(rating_history, min_player_games=10):
@@ -538,7 +548,7 @@ def run_trueskill_from_registry(registry_games, data_dir=None):
     )
     calculator = TrueSkillCalculator(**ts_params)
     reporter = ReportGenerator(
-        elo_scaling_factor=config.TRUESKILL_ELO_SCALING_FACTOR,
+        elo_scaling_factor=ELO_SCALING_FACTOR,
         initial_unscaled_sigma=config.TRUESKILL_SIGMA,
         plot_min_games=PLOT_MIN_GAMES_THRESHOLD,
     )
@@ -567,13 +577,15 @@ def run_trueskill_from_registry(registry_games, data_dir=None):
 
     lan_events = detect_lan_events(calculator.rating_history)
 
+    # Group history rows per player once instead of rescanning it per player
+    history_by_player = defaultdict(list)
+    for h in calculator.rating_history:
+        history_by_player[h["player_name"]].append(h)
+
     # Build ratings list
     ratings_list = []
     for player_name, player_rating_obj in calculator.player_ratings.items():
-        player_history = [
-            h for h in calculator.rating_history if h["player_name"] == player_name
-        ]
-        last_30 = player_history[-30:]
+        last_30 = history_by_player[player_name][-30:]
         last_30_handicaps = [h.get("handicap", 100) for h in last_30]
         avg_hc = (
             round(sum(last_30_handicaps) / len(last_30_handicaps), 1)
@@ -585,9 +597,7 @@ def run_trueskill_from_registry(registry_games, data_dir=None):
                 "name": player_name,
                 "mu_scaled": round(player_rating_obj.get_scaled_mu(), 2),
                 "sigma_scaled": round(
-                    player_rating_obj.rating.sigma
-                    * config.TRUESKILL_ELO_SCALING_FACTOR,
-                    2,
+                    player_rating_obj.rating.sigma * ELO_SCALING_FACTOR, 2
                 ),
                 "mu_unscaled": round(player_rating_obj.rating.mu, 4),
                 "sigma_unscaled": round(player_rating_obj.rating.sigma, 4),
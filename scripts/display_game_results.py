@@ -6,10 +6,10 @@ Usage:
 
 import os
 import sys
-from datetime import timedelta
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from analyzer_lib import config, db
+from analyzer_lib.report_generator import format_duration
 
 
 def display_game_by_game_results():
@@ -19,29 +19,33 @@ def display_game_by_game_results():
         print("No game results found. Run main.py first.")
         return
 
-    print(f"--- Game by Game Results ({len(games)} games) ---\n")
+    # Collect every line and write once; this can be thousands of lines
+    lines = [f"--- Game by Game Results ({len(games)} games) ---\n"]
 
     for g in games:
         dt = g.get("datetime", "?")
-        duration = str(timedelta(seconds=int(g.get("duration_seconds", 0))))
+        duration = format_duration(g.get("duration_seconds", 0))
         winning_team_id = g.get("winning_team_id")
 
-        print(f"--- {g.get('filename', '?')} ({dt}, {duration}) ---")
+        lines.append(f"--- {g.get('filename', '?')} ({dt}, {duration}) ---")
 
         if winning_team_id is None:
-            print("  -> No winner determined.\n")
+            lines.append("  -> No winner determined.\n")
             continue
 
         for tid, players in g.get("teams", {}).items():
             is_winner = tid == winning_team_id
             label = "Winning Team" if is_winner else "Losing Team"
-            print(f"  - {label}:")
+            lines.append(f"  - {label}:")
+            status = "Won" if is_winner else "Lost"
             for p in players:
-                status = "Won" if is_winner else "Lost"
                 civ = p.get("civ", "Unknown")
-                print(f"    - {p['name']} ({civ}) [{status}]")
+                lines.append(f"    - {p['name']} ({civ}) [{status}]")
 
-        print("")
+        lines.append("")
+
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 
 if __name__ == "__main__":
@@ -1,7 +1,6 @@
 import json
 import os
 import argparse
-from mgz.model import parse_match, serialize
 
 
 def main():
@@ -30,6 +29,9 @@ def main():
             print(f"Error creating output directory {output_dir}: {e}")
             return
 
+    # Imported here so argument errors and --help don't pay for loading mgz
+    from mgz.model import parse_match, serialize
+
     print(f"Processing: {input_path}")
     try:
         with open(input_path, "rb") as f:
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import argparse
+import heapq
 import itertools
+import math
 import os
 import sys
 from typing import List, Dict, Tuple, Any
@@ -8,9 +10,10 @@ from typing import List, Dict, Tuple, Any
 # --- Add project root to sys.path to allow importing config from analyzer_lib ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
-ANALYZER_LIB_PATH = os.path.join(PROJECT_ROOT, "analyzer_lib")
-sys.path.insert(0, PROJECT_ROOT)
-sys.path.insert(0, ANALYZER_LIB_PATH)
+# analyzer_lib is imported as a package from the root, so only the root is
+# needed; the web app has usually put it on sys.path already
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 try:
     from analyzer_lib import config, db
@@ -212,15 +215,56 @@ def find_balanced_teams(
         print("Need at least 2 players to form two teams.")
         return []
 
-    possible_matchups = []
-    processed_matchups = set()
+    if top_n <= 0:
+        return []
+
+    # Bounded min-heap of the top_n splits found so far; best[0] is the worst
+    # kept. Entries are (-num_benched, quality, -seq, team1, team2), so the
+    # generation sequence number breaks ties in favor of the earlier split.
+    best = []
+    seq = 0
     players_set = set(players)
+    beta2 = ts_env.beta**2
+    exp, sqrt = math.exp, math.sqrt  # local names for the scoring loop
+    mus = {name: r.mu for name, r in player_ts_ratings.items()}
+    sigma2s = {name: r.sigma**2 for name, r in player_ts_ratings.items()}
+    position = {name: i for i, name in enumerate(players)}
     needs_bench = num_players > MAX_TEAM_SIZE * 2
 
+    # Fewest benched ranks first, so when players must be benched only the
+    # smallest bench counts can make the top_n. Count the splits per bench count
+    # up front and skip every team size that benches more than that.
+    max_benched = num_players
+    if needs_bench:
+        splits_per_bench = {}
+        for team1_size in range(1, MAX_TEAM_SIZE + 1):
+            for team2_size in range(
+                team1_size, min(MAX_TEAM_SIZE, num_players - team1_size) + 1
+            ):
+                count = math.comb(num_players, team1_size) * math.comb(
+                    num_players - team1_size, team2_size
+                )
+                if team2_size == team1_size:
+                    count //= 2  # unordered pair of same-size teams
+                benched = num_players - team1_size - team2_size
+                splits_per_bench[benched] = splits_per_bench.get(benched, 0) + count
+        found = 0
+        for benched in sorted(splits_per_bench):
+            found += splits_per_bench[benched]
+            if found >= top_n:
+                max_benched = benched
+                break
+
+    # Each split is generated exactly once: team 1 is never the larger side, and
+    # for equal sizes it holds the first-listed player of the two teams (team 2
+    # is then drawn only from players listed after team 1's first player).
     for team1_size in range(1, min(num_players, MAX_TEAM_SIZE) + 1):
+        largest_team2 = min(MAX_TEAM_SIZE, num_players - team1_size)
+        if needs_bench and num_players - team1_size - largest_team2 > max_benched:
+            continue
         for team1_tuple in itertools.combinations(players, team1_size):
-            team1_names = list(team1_tuple)
-            remaining = [p for p in players if p not in team1_names]
+            team1_set = set(team1_tuple)
+            remaining = [p for p in players if p not in team1_set]
 
             if needs_bench:
                 # Allow benching: team2 can be any size from team1_size to MAX_TEAM_SIZE
@@ -228,35 +272,65 @@ def find_balanced_teams(
                 max_t2 = min(MAX_TEAM_SIZE, len(remaining))
             else:
                 # No bench: team2 is everyone else (original behavior)
-                if len(remaining) > MAX_TEAM_SIZE or len(remaining) < 1:
+                if len(remaining) > MAX_TEAM_SIZE or len(remaining) < team1_size:
                     continue
                 min_t2 = len(remaining)
                 max_t2 = len(remaining)
 
-            for team2_size in range(min_t2, max_t2 + 1):
-                for team2_tuple in itertools.combinations(remaining, team2_size):
-                    team2_names = list(team2_tuple)
+            team1_mu = sum(mus[n] for n in team1_tuple)
+            team1_sigma2 = sum(sigma2s[n] for n in team1_tuple)
 
-                    canonical = tuple(
-                        sorted((tuple(sorted(team1_names)), tuple(sorted(team2_names))))
-                    )
-                    if canonical in processed_matchups:
-                        continue
-                    processed_matchups.add(canonical)
+            first = position[team1_tuple[0]]
+            same_size_pool = [p for p in remaining if position[p] > first]
 
-                    t1_ratings = tuple(player_ts_ratings[n] for n in team1_names)
-                    t2_ratings = tuple(player_ts_ratings[n] for n in team2_names)
-
-                    quality = ts_env.quality([t1_ratings, t2_ratings])
-                    benched = sorted(players_set - set(team1_names) - set(team2_names))
-                    possible_matchups.append(
-                        (quality, sorted(team1_names), sorted(team2_names), benched)
+            for team2_size in range(min_t2, max_t2 + 1):
+                num_benched = num_players - team1_size - team2_size
+                if num_benched > max_benched or (
+                    len(best) == top_n and num_benched > -best[0][0]
+                ):
+                    # Benches more than the top_n need / every kept split
+                    continue
+                pool = same_size_pool if team2_size == team1_size else remaining
+                n_beta2 = beta2 * (team1_size + team2_size)
+                for team2_tuple in itertools.combinations(pool, team2_size):
+                    # Closed-form two-team match quality (draw probability). The
+                    # float operations match trueskill.TrueSkill.quality() in
+                    # value and order (sums accumulated player by player, team 1
+                    # then team 2), so scores are identical to calling it.
+                    delta_mu = team1_mu
+                    sum_sigma2 = team1_sigma2
+                    for n in team2_tuple:
+                        delta_mu -= mus[n]
+                        sum_sigma2 += sigma2s[n]
+                    denom = n_beta2 + sum_sigma2
+                    quality = exp(-0.5 * delta_mu * (1.0 / denom) * delta_mu) * sqrt(
+                        n_beta2 / denom
                     )
-
-    # Sort: fewest benched first (maximize players in game), then by quality descending
-    possible_matchups.sort(key=lambda x: (len(x[3]), -x[0]))
-
-    return possible_matchups[:top_n]
+                    # Rank: fewest benched first (maximize players in game), then
+                    # by quality descending; only splits beating the worst kept
+                    # one are stored
+                    if len(best) < top_n:
+                        heapq.heappush(
+                            best,
+                            (-num_benched, quality, -seq, team1_tuple, team2_tuple),
+                        )
+                    elif (-num_benched, quality) > best[0][:2]:
+                        heapq.heapreplace(
+                            best,
+                            (-num_benched, quality, -seq, team1_tuple, team2_tuple),
+                        )
+                    seq += 1
+
+    # The name lists are only built for the splits that are returned
+    return [
+        (
+            quality,
+            sorted(team1_tuple),
+            sorted(team2_tuple),
+            sorted(players_set - set(team1_tuple) - set(team2_tuple)),
+        )
+        for _, quality, _, team1_tuple, team2_tuple in sorted(best, reverse=True)
+    ]
 
 
 def main():
@@ -345,19 +419,18 @@ def main():
 
     print(f"Attempting to balance teams for: {', '.join(requested_player_names)}")
 
+    # One pass: ratings for the players found, in requested order, and the rest
     player_ts_ratings: Dict[str, trueskill.Rating] = {}
-    valid_player_names_for_balancing = []
     missing_players_from_ratings = []
 
     for name in requested_player_names:
-        if name in all_player_ratings_data:
-            player_data = all_player_ratings_data[name]
+        player_data = all_player_ratings_data.get(name)
+        if player_data is None:
+            missing_players_from_ratings.append(name)
+        else:
             player_ts_ratings[name] = trueskill.Rating(
                 mu=player_data["mu_unscaled"], sigma=player_data["sigma_unscaled"]
             )
-            valid_player_names_for_balancing.append(name)
-        else:
-            missing_players_from_ratings.append(name)
 
     if missing_players_from_ratings:
         print(
@@ -366,46 +439,34 @@ def main():
         for p_name in sorted(missing_players_from_ratings):
             print(f"  - {p_name}")
 
-        if not valid_player_names_for_balancing:
+        if not player_ts_ratings:
             print(
                 "\nError: None of the provided players were found in the ratings file. Exiting."
             )
             sys.exit(1)
         print(
-            f"\nProceeding with balancing for: {', '.join(sorted(valid_player_names_for_balancing))}\n"
+            f"\nProceeding with balancing for: {', '.join(sorted(player_ts_ratings))}\n"
         )
     else:
         print("All requested players found in ratings file.\n")
 
-    if len(valid_player_names_for_balancing) < 2:
+    if len(player_ts_ratings) < 2:
         print("Error: Need at least two players with available ratings to form teams.")
         sys.exit(1)
 
-    # Filter player_ts_ratings to only include valid players for find_balanced_teams
-    final_player_ts_ratings = {
-        name: rating
-        for name, rating in player_ts_ratings.items()
-        if name in valid_player_names_for_balancing
-    }
-
-    balanced_teams = find_balanced_teams(
-        final_player_ts_ratings, ts_env, top_n=args.top_n
-    )
+    balanced_teams = find_balanced_teams(player_ts_ratings, ts_env, top_n=args.top_n)
 
     if not balanced_teams:
         print(
             "Could not find any balanced team combinations (perhaps too few players after filtering or an issue in logic)."
         )
     else:
-        print(
-            f"--- Top {min(args.top_n, len(balanced_teams))} Most Balanced Team Combinations ---"
-        )
-        print(
-            f"(Based on TrueSkill Beta: {TS_BETA:.4f}, a configured draw probability of {TS_DRAW_PROBABILITY*100:.1f}% is used for rating updates)"
-        )
-        print(
-            "Match Quality is the calculated probability of a draw. A higher percentage indicates a more balanced and unpredictable game."
-        )
+        # Collected and written with one print instead of one call per line
+        lines = [
+            f"--- Top {min(args.top_n, len(balanced_teams))} Most Balanced Team Combinations ---",
+            f"(Based on TrueSkill Beta: {TS_BETA:.4f}, a configured draw probability of {TS_DRAW_PROBABILITY*100:.1f}% is used for rating updates)",
+            "Match Quality is the calculated probability of a draw. A higher percentage indicates a more balanced and unpredictable game.",
+        ]
 
         def fmt_player(name):
             data = all_player_ratings_data[name]
@@ -419,84 +480,73 @@ def main():
             team2_names_sorted,
             benched_names,
         ) in enumerate(balanced_teams):
-            print(f"\n--- Suggestion #{i+1} ---")
-            print(f"Match Quality: {quality*100:.2f}%")
-            print(f"  Team 1: {', '.join(fmt_player(n) for n in team1_names_sorted)}")
-            print(f"  Team 2: {', '.join(fmt_player(n) for n in team2_names_sorted)}")
+            lines.append(f"\n--- Suggestion #{i+1} ---")
+            lines.append(f"Match Quality: {quality*100:.2f}%")
+            lines.append(
+                f"  Team 1: {', '.join(fmt_player(n) for n in team1_names_sorted)}"
+            )
+            lines.append(
+                f"  Team 2: {', '.join(fmt_player(n) for n in team2_names_sorted)}"
+            )
             if benched_names:
-                print(f"  Benched: {', '.join(benched_names)}")
+                lines.append(f"  Benched: {', '.join(benched_names)}")
 
-            # Determine Expected Winner by comparing sum of ratings
-            team1_mu_sum = sum(
-                final_player_ts_ratings[name].mu for name in team1_names_sorted
+            team1_ratings = tuple(
+                player_ts_ratings[name] for name in team1_names_sorted
             )
-            team2_mu_sum = sum(
-                final_player_ts_ratings[name].mu for name in team2_names_sorted
+            team2_ratings = tuple(
+                player_ts_ratings[name] for name in team2_names_sorted
             )
 
+            # Determine Expected Winner by comparing sum of ratings
+            team1_mu_sum = sum(r.mu for r in team1_ratings)
+            team2_mu_sum = sum(r.mu for r in team2_ratings)
+
             if abs(team1_mu_sum - team2_mu_sum) < 0.01:  # Arbitrary small threshold
                 expected_winner = "Too close to call"
             elif team1_mu_sum > team2_mu_sum:
                 expected_winner = "Team 1"
             else:
                 expected_winner = "Team 2"
-            print(f"  Expected Winner: {expected_winner}")
-
-            # --- Simulate outcomes and store deltas ---
-            team1_ratings = tuple(
-                final_player_ts_ratings[name] for name in team1_names_sorted
-            )
-            team2_ratings = tuple(
-                final_player_ts_ratings[name] for name in team2_names_sorted
-            )
-
-            potential_changes = {}
+            lines.append(f"  Expected Winner: {expected_winner}")
 
+            # --- Simulate both outcomes and list each player's change ---
             if team1_ratings and team2_ratings:
-                # Simulate Team 1 winning (Team 2 loses)
                 t1_wins_ratings = ts_env.rate(
                     [team1_ratings, team2_ratings], ranks=[0, 1]
                 )
-                # Simulate Team 2 winning (Team 1 loses)
                 t2_wins_ratings = ts_env.rate(
                     [team1_ratings, team2_ratings], ranks=[1, 0]
                 )
 
-                # Populate changes for Team 1 players
-                for idx, player_name in enumerate(team1_names_sorted):
-                    old_mu = team1_ratings[idx].mu
-                    potential_changes[player_name] = {
-                        "win": (t1_wins_ratings[0][idx].mu - old_mu)
-                        * ELO_SCALING_FACTOR,
-                        "loss": (t2_wins_ratings[0][idx].mu - old_mu)
-                        * ELO_SCALING_FACTOR,
-                    }
-
-                # Populate changes for Team 2 players
-                for idx, player_name in enumerate(team2_names_sorted):
-                    old_mu = team2_ratings[idx].mu
-                    potential_changes[player_name] = {
-                        "win": (t2_wins_ratings[1][idx].mu - old_mu)
-                        * ELO_SCALING_FACTOR,
-                        "loss": (t1_wins_ratings[1][idx].mu - old_mu)
-                        * ELO_SCALING_FACTOR,
-                    }
-
-            # --- Print the simplified summary ---
-            if potential_changes:
-                print("\n  Potential Rating Changes (Win / Loss):")
-                print("    Team 1:")
-                for player_name in team1_names_sorted:
-                    changes = potential_changes[player_name]
-                    print(
-                        f"      {player_name:<16}: {changes['win']:+6.2f} / {changes['loss']:+6.2f}"
-                    )
-                print("    Team 2:")
-                for player_name in team2_names_sorted:
-                    changes = potential_changes[player_name]
-                    print(
-                        f"      {player_name:<16}: {changes['win']:+6.2f} / {changes['loss']:+6.2f}"
-                    )
+                lines.append("\n  Potential Rating Changes (Win / Loss):")
+                for label, names, old_ratings, win_ratings, loss_ratings in (
+                    (
+                        "    Team 1:",
+                        team1_names_sorted,
+                        team1_ratings,
+                        t1_wins_ratings[0],
+                        t2_wins_ratings[0],
+                    ),
+                    (
+                        "    Team 2:",
+                        team2_names_sorted,
+                        team2_ratings,
+                        t2_wins_ratings[1],
+                        t1_wins_ratings[1],
+                    ),
+                ):
+                    lines.append(label)
+                    for player_name, old, win, loss in zip(
+                        names, old_ratings, win_ratings, loss_ratings
+                    ):
+                        win_change = (win.mu - old.mu) * ELO_SCALING_FACTOR
+                        loss_change = (loss.mu - old.mu) * ELO_SCALING_FACTOR
+                        lines.append(
+                            f"      {player_name:<16}: {win_change:+6.2f} / {loss_change:+6.2f}"
+                        )
+
+        print("\n".join(lines))
 
 
 if __name__ == "__main__":
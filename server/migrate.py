@@ -16,7 +16,7 @@ import hashlib
 import logging
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 
 # Ensure project root and scripts are importable
 _SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +25,7 @@ sys.path.insert(0, _PROJECT_ROOT)
 sys.path.insert(0, os.path.join(_PROJECT_ROOT, "scripts"))
 
 from analyzer_lib import config
-from analyzer_lib.registry_builder import replay_to_registry_entry
+from analyzer_lib.registry_builder import scan_replay_files, replay_to_registry_entry
 from calculate_trueskill import run_trueskill_from_registry
 
 from server.processing import (
@@ -39,30 +39,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-REPLAY_EXTENSIONS = (".aoe2record", ".mgz", ".mgx")
-
 
 def _find_replay_files(replay_dir):
-    """Walk replay_dir recursively and return list of full file paths."""
-    files = []
-    for root, _, filenames in os.walk(replay_dir):
-        for fn in filenames:
-            if any(fn.lower().endswith(ext) for ext in REPLAY_EXTENSIONS):
-                files.append(os.path.join(root, fn))
-    return files
+    """Scan replay_dir recursively and return list of full file paths."""
+    if not os.path.isdir(replay_dir):
+        return []
+    return [dir_entry.path for dir_entry in scan_replay_files(replay_dir)]
 
 
 def _process_single_file(file_path):
     """Read, hash, parse, and build a registry entry for a single replay file.
 
-    Returns (entry_dict, file_bytes) tuple. file_bytes is needed for bucket upload.
+    Runs in a worker process. Returns (entry_dict, error_message); exactly one
+    is None. File bytes stay in the worker and are re-read for bucket upload.
     """
-    filename = os.path.basename(file_path)
-    with open(file_path, "rb") as f:
-        file_bytes = f.read()
-    sha256 = hashlib.sha256(file_bytes).hexdigest()
-    entry = replay_to_registry_entry(file_bytes, sha256, filename_hint=filename)
-    return entry, file_bytes
+    try:
+        filename = os.path.basename(file_path)
+        with open(file_path, "rb") as f:
+            file_bytes = f.read()
+        sha256 = hashlib.sha256(file_bytes).hexdigest()
+        entry = replay_to_registry_entry(file_bytes, sha256, filename_hint=filename)
+        return entry, None
+    except Exception as e:
+        return None, str(e)
 
 
 def main():
@@ -107,7 +106,7 @@ def main():
     # ── Step 2: Parse all replays in parallel ──────────────────────────
     logger.info("Parsing replays...")
     entries = []
-    file_bytes_map = {}  # sha256 -> file_bytes (for bucket upload)
+    upload_paths = {}  # sha256 -> file path (for bucket upload)
     counts = {
         "processed": 0,
         "no_winner": 0,
@@ -118,34 +117,34 @@ def main():
     }
     seen_fingerprints = set()
 
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = {executor.submit(_process_single_file, fp): fp for fp in file_paths}
-        for i, future in enumerate(as_completed(futures), 1):
+    # Parsing is CPU-bound, so fan out to processes; results come back in scan
+    # order, which keeps fingerprint dedup deterministic.
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = executor.map(_process_single_file, file_paths, chunksize=4)
+        for i, (file_path, (entry, error)) in enumerate(zip(file_paths, results), 1):
             if i % 50 == 0 or i == len(file_paths):
                 logger.info(f"Parsed {i}/{len(file_paths)}...")
-            try:
-                entry, file_bytes = future.result()
-
-                # Deduplicate by fingerprint (same game recorded by different players)
-                fp = entry.get("fingerprint")
-                if fp and fp in seen_fingerprints:
-                    entry["status"] = "duplicate"
-                elif fp:
-                    seen_fingerprints.add(fp)
-
-                entries.append(entry)
-                counts[entry["status"]] += 1
-
-                # Keep file bytes for bucket upload if game is useful
-                if not args.skip_bucket and entry["status"] in (
-                    "processed",
-                    "no_winner",
-                ):
-                    file_bytes_map[entry["sha256"]] = file_bytes
-
-            except Exception as e:
-                logger.error(f"Failed to process {futures[future]}: {e}")
+            if entry is None:
+                logger.error(f"Failed to process {file_path}: {error}")
                 counts["parse_error"] += 1
+                continue
+
+            # Deduplicate by fingerprint (same game recorded by different players)
+            fp = entry.get("fingerprint")
+            if fp and fp in seen_fingerprints:
+                entry["status"] = "duplicate"
+            elif fp:
+                seen_fingerprints.add(fp)
+
+            entries.append(entry)
+            counts[entry["status"]] += 1
+
+            # Remember the file for bucket upload if game is useful
+            if not args.skip_bucket and entry["status"] in (
+                "processed",
+                "no_winner",
+            ):
+                upload_paths[entry["sha256"]] = file_path
 
     # ── Step 3: Sort chronologically and save registry ─────────────────
     entries.sort(key=lambda e: e.get("datetime", ""))
@@ -156,25 +155,23 @@ def main():
     logger.info(f"Game registry saved: {registry.path}")
 
     # ── Step 4: Upload to bucket (if configured) ──────────────────────
-    if not args.skip_bucket and file_bytes_map:
+    if not args.skip_bucket and upload_paths:
         try:
             from server import storage
 
-            total = len(file_bytes_map)
+            total = len(upload_paths)
             logger.info(f"Uploading {total} replays to bucket...")
-            for i, (sha256, fb) in enumerate(file_bytes_map.items(), 1):
+            for i, (sha256, file_path) in enumerate(upload_paths.items(), 1):
                 if i % 10 == 0 or i == total:
                     logger.info(f"Uploading to bucket: {i}/{total}...")
-                storage.upload_replay(fb, sha256)
+                with open(file_path, "rb") as f:
+                    storage.upload_replay(f.read(), sha256)
             logger.info("Bucket uploads complete")
         except Exception as e:
             logger.warning(f"Bucket upload skipped: {e}")
     elif args.skip_bucket:
         logger.info("Bucket upload skipped (--skip-bucket flag)")
 
-    # Free memory before rebuilds
-    file_bytes_map.clear()
-
     # ── Step 5: Generate TrueSkill ratings ─────────────────────────────
     logger.info("Generating TrueSkill ratings...")
     ratable_games = registry.get_games(status="processed")
@@ -108,6 +108,11 @@ class GameRegistry:
         ).fetchone()
         return row is not None
 
+    def get_sha256s(self):
+        """Return the SHA256 of every game in the registry as a frozenset."""
+        rows = self._conn.execute("SELECT sha256 FROM games").fetchall()
+        return frozenset(row[0] for row in rows)
+
     def get_fingerprint_status(self, fingerprint):
         """Return the status of an existing game by fingerprint, or None if not found."""
         if not fingerprint:
@@ -176,6 +181,27 @@ class GameRegistry:
         self._conn.commit()
         return cursor.rowcount > 0
 
+    def get_file_sha256(self, path, mtime_ns, size):
+        """Return the cached SHA256 of a local replay file if it is unchanged.
+
+        The cache is keyed by (path, mtime_ns, size), so a file that was
+        modified or replaced since it was last hashed returns None.
+        """
+        row = self._conn.execute(
+            "SELECT sha256 FROM replay_files WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (path, mtime_ns, size),
+        ).fetchone()
+        return row[0] if row else None
+
+    def record_file_sha256s(self, rows):
+        """Cache (path, mtime_ns, size, sha256) rows for local replay files."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO replay_files (path, mtime_ns, size, sha256) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
     def flush(self):
         """No-op — SQLite auto-commits per write."""
         pass
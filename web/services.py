@@ -2,7 +2,6 @@ import hashlib
 import logging
 import os
 import sys
-from datetime import timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -11,6 +10,7 @@ sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
 
 import trueskill
 from analyzer_lib import config, db
+from analyzer_lib.report_generator import format_duration
 from handicap_recommender import recommended_handicap
 from team_balancer import find_balanced_teams, suggest_rebalances_data
 
@@ -307,7 +307,7 @@ def _format_game_results(games: List[Dict]) -> List[Dict[str, Any]]:
                 "filename": g["filename"],
                 "datetime": g["datetime"],
                 "duration_seconds": g["duration_seconds"],
-                "duration_display": str(timedelta(seconds=int(g["duration_seconds"]))),
+                "duration_display": format_duration(g["duration_seconds"]),
                 "teams": teams_list,
                 "has_winner": True,
                 "sha256": g.get("sha256"),
@@ -413,9 +413,7 @@ def get_game_detail_for_api(sha256: str) -> Optional[Dict[str, Any]]:
         "filename": entry.get("filename"),
         "datetime": entry.get("datetime"),
         "duration_seconds": entry.get("duration_seconds", 0),
-        "duration_display": str(
-            timedelta(seconds=int(entry.get("duration_seconds", 0)))
-        ),
+        "duration_display": format_duration(entry.get("duration_seconds", 0)),
         "status": entry.get("status"),
         "winning_team_id": entry.get("winning_team_id"),
         "teams": {},